@@ -2,6 +2,7 @@
 
 import os
 import sys
+import asyncio
 import importlib
 from server import PromptServer
 from aiohttp import web
@@ -53,7 +54,8 @@ async def refresh_file_list_endpoint(request):
         if not refresh_func:
             return web.json_response({"error": "Function not registered"}, status=404)
         
-        file_list = refresh_func()
+        # 注册的函数会刷新文件索引并读取完整列表，在线程池中执行以免阻塞事件循环
+        file_list = await asyncio.get_running_loop().run_in_executor(None, refresh_func)
         return web.json_response(file_list)
     except Exception as e:
         return web.json_response({"error": str(e)}, status=500)
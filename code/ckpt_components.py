@@ -0,0 +1,157 @@
+# 文件: ckpt_components.py (按组件加载 Checkpoint: 只读取需要的组件，并复用相同的 CLIP/VAE)
+#
+# XY Plot 的 Checkpoint 轴默认会完整加载每个 Checkpoint 的 UNet/CLIP/VAE。
+# 对于基于同一底模的微调模型，CLIP 与 VAE 往往完全相同；这里通过 safetensors 头部
+# (键名/类型/形状) 加上抽样的张量字节计算组件指纹，相同指纹的组件只加载一次。
+
+import hashlib
+import json
+import os
+import struct
+
+import comfy.sd
+import folder_paths
+
+try:
+    from safetensors import safe_open
+except ImportError:
+    safe_open = None
+
+COMPONENT_PREFIXES = {
+    "clip": ("cond_stage_model.", "conditioner.", "text_encoders.", "text_encoder."),
+    "vae": ("first_stage_model.", "vae."),
+}
+COMPONENT_MODES = ["checkpoint", "plot input", "shared (auto)"]
+
+# 指纹中每个张量抽样的字节数 (头、中、尾各一段)
+FINGERPRINT_SAMPLE_BYTES = 4096
+
+_fingerprint_cache = {}
+
+
+# ======================================================================
+#  safetensors 头部与指纹
+# ======================================================================
+
+def read_safetensors_header(path):
+    """读取 safetensors 头部，返回 (header, 数据区起始偏移)；不是 safetensors 时返回 (None, 0)。"""
+    if not path.lower().endswith((".safetensors", ".sft")):
+        return None, 0
+    with open(path, "rb") as f:
+        header_len = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    header.pop("__metadata__", None)
+    return header, 8 + header_len
+
+
+def component_fingerprint(path, kind):
+    """计算 Checkpoint 中某个组件 (clip / vae) 的指纹，无法计算时返回 None。"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    cache_key = (path, st.st_size, st.st_mtime_ns, kind)
+    if cache_key in _fingerprint_cache:
+        return _fingerprint_cache[cache_key]
+
+    fingerprint = None
+    try:
+        header, data_start = read_safetensors_header(path)
+        if header is not None:
+            prefixes = COMPONENT_PREFIXES[kind]
+            keys = sorted(k for k in header if k.startswith(prefixes))
+            if keys:
+                m = hashlib.sha256()
+                with open(path, "rb") as f:
+                    for key in keys:
+                        info = header[key]
+                        begin, end = info["data_offsets"]
+                        # 去掉前缀后再比较，不同模型格式的同一组件也能匹配
+                        short_key = key.split(".", 1)[1] if "." in key else key
+                        m.update(f"{short_key}|{info['dtype']}|{info['shape']}".encode("utf-8"))
+                        size = end - begin
+                        for offset in sorted({0, max(0, size // 2 - FINGERPRINT_SAMPLE_BYTES // 2), max(0, size - FINGERPRINT_SAMPLE_BYTES)}):
+                            f.seek(data_start + begin + offset)
+                            m.update(f.read(min(FINGERPRINT_SAMPLE_BYTES, size - offset)))
+                fingerprint = m.hexdigest()
+    except Exception as e:
+        print(f"计算 '{os.path.basename(path)}' 的 {kind} 指纹失败: {e}")
+
+    _fingerprint_cache[cache_key] = fingerprint
+    return fingerprint
+
+
+# ======================================================================
+#  组件加载
+# ======================================================================
+
+def load_checkpoint_parts(path, output_clip=False, output_vae=False, embedding_directory=None):
+    """读取一次 Checkpoint，返回 (model, clip, vae)。
+
+    不需要的 CLIP/VAE 按键名前缀跳过，它们的张量不会从磁盘读取；不是 safetensors 或旧版 ComfyUI
+    时退回到 load_checkpoint_guess_config 的完整加载。
+    """
+    load_sd = getattr(comfy.sd, "load_state_dict_guess_config", None)
+    if safe_open is not None and load_sd is not None and path.lower().endswith((".safetensors", ".sft")):
+        skip = (() if output_clip else COMPONENT_PREFIXES["clip"]) + (() if output_vae else COMPONENT_PREFIXES["vae"])
+        sd = {}
+        with safe_open(path, framework="pt", device="cpu") as f:
+            for key in f.keys():
+                if not key.startswith(skip):
+                    sd[key] = f.get_tensor(key)
+        out = load_sd(sd, output_vae=output_vae, output_clip=output_clip, embedding_directory=embedding_directory)
+        if out is not None and out[0] is not None:
+            return tuple(out[:3])
+    out = comfy.sd.load_checkpoint_guess_config(path, output_vae=output_vae, output_clip=output_clip, embedding_directory=embedding_directory)
+    return tuple(out[:3])
+
+
+class CheckpointComponentLoader:
+    """XY Plot Checkpoint 轴的加载器，返回 (model, clip, vae)，加载失败返回 None。
+
+    clip_mode / vae_mode:
+      - "checkpoint":    从每个 Checkpoint 读取 (原有行为)
+      - "plot input":    直接复用 XY Plot 节点输入的 CLIP / VAE
+      - "shared (auto)": 按组件指纹判断，相同的组件在整个 XY Plot 中只加载一次
+
+    无论哪种组合，每个 Checkpoint 只读取一次，且只读取仍需要加载的组件。
+    """
+
+    def __init__(self, clip_mode="checkpoint", vae_mode="checkpoint", plot_clip=None, plot_vae=None):
+        self.modes = {"clip": clip_mode, "vae": vae_mode}
+        self.plot_inputs = {"clip": plot_clip, "vae": plot_vae}
+        self.shared = {}
+        self.embedding_directory = folder_paths.get_folder_paths("embeddings")
+
+    def __call__(self, ckpt_name):
+        ckpt_path = folder_paths.get_full_path("checkpoints", ckpt_name)
+        try:
+            parts, fingerprints = {}, {}
+            for kind in ("clip", "vae"):
+                found, component, fingerprint = self.reuse(ckpt_path, kind)
+                if found:
+                    parts[kind] = component
+                fingerprints[kind] = fingerprint
+            model, clip, vae = load_checkpoint_parts(ckpt_path, "clip" not in parts, "vae" not in parts, self.embedding_directory)
+            for kind, component in (("clip", clip), ("vae", vae)):
+                if kind not in parts:
+                    parts[kind] = component
+                    if fingerprints[kind] is not None:
+                        self.shared[(kind, fingerprints[kind])] = component
+            return model, parts["clip"], parts["vae"]
+        except Exception as e:
+            print(f"加载 Checkpoint '{ckpt_name}' 失败: {e}")
+            return None
+
+    def reuse(self, ckpt_path, kind):
+        """返回 (是否无需从该 Checkpoint 读取, 复用的组件, 共享模式下的指纹)。"""
+        mode = self.modes[kind]
+        if mode == "plot input":
+            return True, self.plot_inputs[kind], None
+        if mode == "shared (auto)":
+            fingerprint = component_fingerprint(ckpt_path, kind)
+            if fingerprint is not None and (kind, fingerprint) in self.shared:
+                print(f"XY Plot: '{os.path.basename(ckpt_path)}' 的 {kind.upper()} 与之前的 Checkpoint 相同，直接复用")
+                return True, self.shared[(kind, fingerprint)], fingerprint
+            return False, None, fingerprint
+        return False, None, None
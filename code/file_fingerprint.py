@@ -0,0 +1,50 @@
+# 文件: file_fingerprint.py (文件指纹缓存: 以 stat 信息为键缓存内容哈希，供 IS_CHANGED 和解码缓存使用)
+#
+# 只有 (path, size, mtime_ns, inode) 变化时才重新计算 SHA-256，并且按块流式读取，
+# 不再为每次提示词校验把整个文件读进内存。
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+HASH_CHUNK_SIZE = 1024 * 1024
+MAX_CACHE_ENTRIES = 4096
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def stat_key(path):
+    """文件的 stat 指纹 (path, size, mtime_ns, inode)，文件不存在时返回 None。"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def hash_file(path, chunk_size=HASH_CHUNK_SIZE):
+    m = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            m.update(chunk)
+    return m.hexdigest()
+
+
+def file_fingerprint(path):
+    """文件内容的 SHA-256 (十六进制)，stat 信息未变时直接返回缓存结果；文件不存在时返回 None。"""
+    key = stat_key(path)
+    if key is None:
+        return None
+    with _lock:
+        digest = _cache.get(key)
+        if digest is not None:
+            _cache.move_to_end(key)
+            return digest
+    digest = hash_file(path)
+    with _lock:
+        _cache[key] = digest
+        while len(_cache) > MAX_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return digest
@@ -0,0 +1,265 @@
+# 文件: file_index.py (持久化的增量文件索引: SQLite 记录 output/temp/input 下的文件，只重新扫描修改过的目录)
+#
+# 每个目录记录自身的 mtime_ns；刷新时目录 mtime 未变就直接沿用数据库里的文件和子目录，
+# 只有新增/删除/重命名过文件的目录才会重新 scandir。跟随符号链接，但用 (st_dev, st_ino) 防止循环。
+# 注意：原地覆盖写入不会改变目录 mtime，这类文件的 mtime/size 需要 full=True 的完整扫描才会更新。
+
+import fnmatch
+import os
+import sqlite3
+import threading
+import uuid
+
+from .preview_store import PREVIEW_SUBFOLDER
+from .supernova_config import get_data_dir, get_setting
+
+# 预览存储里的缩略图/链接不是用户文件，不进入索引
+DEFAULT_EXCLUDES = [".git", "__pycache__", PREVIEW_SUBFOLDER]
+
+# 查询时可用的排序方式，前缀 "-" 表示降序
+SORT_COLUMNS = {"mtime": "mtime", "name": "relpath", "size": "size"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    root TEXT NOT NULL, relpath TEXT NOT NULL, parent TEXT, mtime_ns INTEGER,
+    PRIMARY KEY (root, relpath)
+);
+CREATE TABLE IF NOT EXISTS files (
+    root TEXT NOT NULL, relpath TEXT NOT NULL, dir TEXT NOT NULL, ext TEXT, mtime REAL, size INTEGER,
+    PRIMARY KEY (root, relpath)
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (root, parent);
+CREATE INDEX IF NOT EXISTS files_dir ON files (root, dir);
+CREATE INDEX IF NOT EXISTS files_mtime ON files (mtime);
+"""
+
+
+def _like_prefix(relpath):
+    escaped = relpath.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "/%"
+
+
+def _glob_match(relpath, pattern):
+    """不区分大小写的通配符匹配，模式不含 "/" 时只匹配文件名。"""
+    relpath, pattern = relpath.lower(), pattern.lower()
+    if "/" not in pattern:
+        return fnmatch.fnmatchcase(relpath.rpartition("/")[2], pattern)
+    return fnmatch.fnmatchcase(relpath, pattern)
+
+
+def _join(rel, name):
+    return f"{rel}/{name}" if rel else name
+
+
+class FileIndex:
+    """以 (root, relpath) 为键的文件索引，root 为根目录的绝对路径，relpath 统一使用 "/" 分隔。"""
+
+    def __init__(self, db_path, exclude=None):
+        self.db_path = db_path
+        # 用户的排除项追加在默认排除项之后，不会取代它们
+        if isinstance(exclude, str):
+            exclude = [exclude]
+        self.exclude = DEFAULT_EXCLUDES + [p for p in exclude or [] if p not in DEFAULT_EXCLUDES]
+        self.lock = threading.RLock()
+        self._conn = None
+        self.listeners = []
+        # 每次刷新发现变化时递增，与进程令牌一起组成列表的 ETag
+        self.token = uuid.uuid4().hex[:8]
+        self.version = 0
+
+    # --- 数据库 ---
+
+    def _connect(self):
+        if self._conn is None:
+            try:
+                self._conn = self._open()
+            except sqlite3.DatabaseError as e:
+                # 索引只是缓存，损坏时直接重建
+                print(f"文件索引 '{self.db_path}' 已损坏，将重建: {e}")
+                os.remove(self.db_path)
+                self._conn = self._open()
+        return self._conn
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        conn.create_function("glob_match", 2, _glob_match, deterministic=True)
+        return conn
+
+    def _excluded(self, name, relpath):
+        return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(relpath, p) for p in self.exclude)
+
+    def _drop_dir(self, conn, root, rel, stats=None):
+        """删除一个目录及其所有子目录的记录 (stats 不为 None 时把被删除的文件记入 removed)。"""
+        if rel:
+            like = _like_prefix(rel)
+            if stats is not None:
+                stats["removed"].extend(conn.execute(
+                    "SELECT root, relpath FROM files WHERE root=? AND (dir=? OR dir LIKE ? ESCAPE '\\')", (root, rel, like)).fetchall())
+            conn.execute("DELETE FROM files WHERE root=? AND (dir=? OR dir LIKE ? ESCAPE '\\')", (root, rel, like))
+            conn.execute("DELETE FROM dirs WHERE root=? AND (relpath=? OR relpath LIKE ? ESCAPE '\\')", (root, rel, like))
+        else:
+            if stats is not None:
+                stats["removed"].extend(conn.execute("SELECT root, relpath FROM files WHERE root=?", (root,)).fetchall())
+            conn.execute("DELETE FROM files WHERE root=?", (root,))
+            conn.execute("DELETE FROM dirs WHERE root=?", (root,))
+
+    # --- 变化通知 ---
+
+    def add_listener(self, fn):
+        """注册 fn(root, added, removed)：任何调用方的 refresh 发现新增/删除的文件时都会调用。
+
+        root 为根目录的绝对路径，added/removed 为 relpath 列表；根目录第一次建立索引时不通知。
+        """
+        if fn not in self.listeners:
+            self.listeners.append(fn)
+
+    def _notify(self, root, stats):
+        added, removed = [r for _, r in stats["added"]], [r for _, r in stats["removed"]]
+        for fn in list(self.listeners):
+            try:
+                fn(root, added, removed)
+            except Exception as e:
+                print(f"文件索引: 通知变化失败: {e}")
+
+    # --- 扫描 ---
+
+    def refresh(self, root, full=False):
+        """增量刷新一个根目录，发现新增/删除的文件时通知监听器。
+
+        返回 {"dirs": 检查的目录数, "rescanned": 重新列出的目录数, "added": [...], "removed": [...]}，
+        added/removed 为新增/消失的文件 (root, relpath)；原地修改的文件不计入。
+        """
+        root = os.path.abspath(root)
+        stats = {"dirs": 0, "rescanned": 0, "added": [], "removed": []}
+        with self.lock:
+            conn = self._connect()
+            known = conn.execute("SELECT 1 FROM dirs WHERE root=? LIMIT 1", (root,)).fetchone() is not None
+            with conn:
+                if not os.path.isdir(root):
+                    if known:
+                        self._drop_dir(conn, root, "", stats)
+                        self.version += 1
+                else:
+                    visited, stack = set(), [""]
+                    while stack:
+                        stack.extend(self._scan_dir(conn, root, stack.pop(), visited, full, stats))
+                    if stats["rescanned"]:
+                        self.version += 1
+        if known and (stats["added"] or stats["removed"]):
+            self._notify(root, stats)
+        return stats
+
+    def _scan_dir(self, conn, root, rel, visited, full, stats):
+        full_path = os.path.join(root, *rel.split("/")) if rel else root
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            self._drop_dir(conn, root, rel, stats)
+            return []
+        # 符号链接形成的循环或重复挂载：同一个目录只扫描一次
+        dir_id = (st.st_dev, st.st_ino)
+        if dir_id in visited:
+            self._drop_dir(conn, root, rel, stats)
+            return []
+        visited.add(dir_id)
+        stats["dirs"] += 1
+
+        known_children = [r[0] for r in conn.execute("SELECT relpath FROM dirs WHERE root=? AND parent=?", (root, rel))]
+        row = conn.execute("SELECT mtime_ns FROM dirs WHERE root=? AND relpath=?", (root, rel)).fetchone()
+        if row and row[0] == st.st_mtime_ns and not full:
+            return known_children
+
+        stats["rescanned"] += 1
+        files, subdirs = [], []
+        try:
+            with os.scandir(full_path) as it:
+                for entry in it:
+                    child = _join(rel, entry.name)
+                    try:
+                        if entry.is_dir(follow_symlinks=True):
+                            if not self._excluded(entry.name, child):
+                                subdirs.append(child)
+                        elif entry.is_file(follow_symlinks=True):
+                            fst = entry.stat(follow_symlinks=True)
+                            files.append((root, child, rel, os.path.splitext(entry.name)[1].lower(), fst.st_mtime, fst.st_size))
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"扫描目录 '{full_path}' 失败: {e}")
+            return known_children
+
+        old_files = {r[0] for r in conn.execute("SELECT relpath FROM files WHERE root=? AND dir=?", (root, rel))}
+        new_files = {f[1] for f in files}
+        stats["added"].extend((root, relpath) for relpath in sorted(new_files - old_files))
+        stats["removed"].extend((root, relpath) for relpath in sorted(old_files - new_files))
+
+        conn.execute("DELETE FROM files WHERE root=? AND dir=?", (root, rel))
+        conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", files)
+        for gone in set(known_children) - set(subdirs):
+            self._drop_dir(conn, root, gone, stats)
+        parent = rel.rpartition("/")[0] if rel else None
+        conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)", (root, rel, parent, st.st_mtime_ns))
+        return subdirs
+
+    # --- 查询 ---
+
+    def list_files(self, roots, extensions=None):
+        """roots 为 {名称: 根目录路径}，返回按 mtime 降序的 [(名称, relpath, mtime, size), ...]。"""
+        return self.query(roots, extensions)[0]
+
+    def query(self, roots, extensions=None, prefix="", search="", sort="-mtime", limit=None, offset=0):
+        """带过滤、排序和分页的查询，返回 (行列表, 过滤后的总数)。
+
+        prefix 为子文件夹前缀；search 含 * ? [ 时按通配符匹配，否则为不区分大小写的子串匹配；
+        sort 为 SORT_COLUMNS 中的键，前缀 "-" 表示降序。
+        """
+        names = {os.path.abspath(path): name for name, path in roots.items()}
+        if not names:
+            return [], 0
+        where = f"root IN ({','.join('?' * len(names))})"
+        params = list(names)
+        if extensions:
+            where += f" AND ext IN ({','.join('?' * len(extensions))})"
+            params.extend(sorted(extensions))
+        if prefix:
+            where += " AND relpath LIKE ? ESCAPE '\\'"
+            params.append(_like_prefix(prefix.strip("/")))
+        if search:
+            if any(ch in search for ch in "*?["):
+                where += " AND glob_match(relpath, ?)"
+                params.append(search)
+            else:
+                where += " AND instr(lower(relpath), ?) > 0"
+                params.append(search.lower())
+
+        descending = sort.startswith("-")
+        column = SORT_COLUMNS.get(sort.lstrip("-"), "mtime")
+        order = f"{column} {'DESC' if descending else 'ASC'}, relpath ASC"
+        page = ""
+        if limit is not None:
+            page = " LIMIT ? OFFSET ?"
+        with self.lock:
+            conn = self._connect()
+            total = conn.execute(f"SELECT COUNT(*) FROM files WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(f"SELECT root, relpath, mtime, size FROM files WHERE {where} ORDER BY {order}{page}",
+                                params + ([int(limit), int(offset)] if limit is not None else [])).fetchall()
+        return [(names[root], relpath, mtime, size) for root, relpath, mtime, size in rows], total
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_file_index():
+    """进程内共享的文件索引 (数据库位于 user/supernova/file_index.sqlite3)。
+
+    可在 config.json 中用 "file_index_exclude" 指定额外要跳过的目录名或相对路径通配符 (与 DEFAULT_EXCLUDES 合并)。
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FileIndex(os.path.join(get_data_dir(), "file_index.sqlite3"), get_setting("file_index_exclude"))
+        return _index
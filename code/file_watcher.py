@@ -0,0 +1,89 @@
+# 文件: file_watcher.py (文件变化监听: 监听 input/output/temp，文件变化后及时增量刷新文件索引)
+#
+# 安装了 watchdog 时使用系统通知 (Linux 上为 inotify)，收到事件后很快刷新；否则按间隔轮询目录的 mtime。
+# 两种方式都只通过 FileIndex.refresh 重新列出 mtime 变化过的目录，不做完整扫描。
+# 监听器只负责触发刷新；变化由 FileIndex 通知它的监听器 (add_listener)，与刷新由谁触发无关。
+
+import os
+import threading
+
+from .file_index import get_file_index
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+# 收到通知后等待一小段时间，把连续写入合并成一次刷新
+EVENT_DEBOUNCE = 0.2
+# 使用 watchdog 时的兜底轮询间隔 (秒)
+FALLBACK_POLL_INTERVAL = 30.0
+
+
+class _WakeHandler(FileSystemEventHandler):
+    def __init__(self, wake):
+        self.wake = wake
+
+    def on_any_event(self, event):
+        self.wake.set()
+
+
+class FileWatcher:
+    """后台线程：定期 (或收到文件系统通知时) 刷新索引。
+
+    roots_fn 返回 {名称: 目录}，每次刷新时重新读取，以适应运行中修改的输出目录。
+    """
+
+    def __init__(self, roots_fn, poll_interval=1.0):
+        self.roots_fn = roots_fn
+        self.poll_interval = poll_interval
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.observer = None
+
+    def start(self):
+        if self.thread is not None:
+            return
+        if Observer is not None:
+            try:
+                self.observer = Observer()
+                handler = _WakeHandler(self.wake)
+                for path in self.roots_fn().values():
+                    if os.path.isdir(path):
+                        self.observer.schedule(handler, path, recursive=True)
+                self.observer.daemon = True
+                self.observer.start()
+            except Exception as e:
+                print(f"文件监听: watchdog 启动失败，改用目录轮询: {e}")
+                self.observer = None
+        self.thread = threading.Thread(target=self._run, name="supernova-file-watcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake.set()
+        if self.observer is not None:
+            self.observer.stop()
+
+    def _run(self):
+        index = get_file_index()
+        self._refresh(index)
+        interval = FALLBACK_POLL_INTERVAL if self.observer is not None else self.poll_interval
+        while not self.stop_event.is_set():
+            if self.wake.wait(interval):
+                self.wake.clear()
+                self.stop_event.wait(EVENT_DEBOUNCE)
+                self.wake.clear()
+            if self.stop_event.is_set():
+                break
+            self._refresh(index)
+
+    def _refresh(self, index):
+        for path in self.roots_fn().values():
+            try:
+                index.refresh(path)
+            except Exception as e:
+                print(f"文件监听: 刷新 '{path}' 失败: {e}")
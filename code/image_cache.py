@@ -0,0 +1,103 @@
+# 文件: image_cache.py (进程内共享的解码图片缓存: 按文件指纹 + 解码参数缓存 (image, mask) 张量，按总字节数 LRU 淘汰)
+#
+# 缓存的张量会被多个节点/多次执行共享，调用方只能读取，不能原地修改。
+# 容量在 config.json 中用 "image_cache_mb" 设置 (默认 1024，0 为关闭)。
+
+import threading
+from collections import OrderedDict
+
+import torch
+
+from .file_fingerprint import stat_key
+from .supernova_config import get_setting
+
+DEFAULT_CACHE_MB = 1024
+
+
+def tensor_bytes(value):
+    """张量或 (嵌套的) 张量元组/列表占用的字节数。"""
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if isinstance(value, (tuple, list)):
+        return sum(tensor_bytes(v) for v in value)
+    return 0
+
+
+class DecodedImageCache:
+    """以 (stat 指纹, 解码参数) 为键的 LRU 缓存；文件变化后旧条目会在下次写入时被替换。"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.paths = {}
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        size = tensor_bytes(value)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            path = key[0][0]
+            # 同一文件的旧版本 (stat 指纹不同) 不会再被命中，直接丢弃
+            for old_key in [k for k in self.paths.get(path, ()) if k[0] != key[0]]:
+                self._remove(old_key)
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, size)
+            self.paths.setdefault(path, set()).add(key)
+            self.total += size
+            while self.total > self.max_bytes and self.entries:
+                self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        value, size = self.entries.pop(key)
+        self.total -= size
+        keys = self.paths.get(key[0][0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.paths[key[0][0]]
+
+    def contains(self, path, options):
+        fingerprint = stat_key(path)
+        with self.lock:
+            return fingerprint is not None and (fingerprint, options) in self.entries
+
+    def get_or_load(self, path, options, loader):
+        """返回 path 以 options 解码的结果，未命中时调用 loader() 解码并缓存。"""
+        if self.max_bytes <= 0:
+            return loader()
+        fingerprint = stat_key(path)
+        if fingerprint is None:
+            return loader()
+        key = (fingerprint, options)
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.paths.clear()
+            self.total = 0
+
+
+_cache = None
+
+
+def get_image_cache():
+    global _cache
+    if _cache is None:
+        _cache = DecodedImageCache(int(get_setting("image_cache_mb", DEFAULT_CACHE_MB)) * 1024 * 1024)
+    return _cache
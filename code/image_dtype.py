@@ -0,0 +1,37 @@
+# 文件: image_dtype.py (IMAGE 张量的存储精度: 默认 float32，可选 float16 把长视频/大批量的内存减半)
+#
+# 全局默认值在 config.json 中用 "image_dtype" 设置 ("float32" 或 "float16")，批量加载节点也可以单独指定。
+# 消费端 (保存/编码视频) 逐帧转换为 uint8，不会把整个批次升回 float32。
+
+import numpy as np
+import torch
+
+from .supernova_config import get_setting
+
+# 节点选项："default" 使用 config.json 中的设置
+IMAGE_DTYPES = ["default", "float32", "float16"]
+TORCH_DTYPES = {"float32": torch.float32, "float16": torch.float16}
+
+
+def resolve_image_dtype(option="default"):
+    if option not in TORCH_DTYPES:
+        option = get_setting("image_dtype", "float32")
+    return TORCH_DTYPES.get(option, torch.float32)
+
+
+def to_image_dtype(tensor, option="default"):
+    dtype = resolve_image_dtype(option)
+    return tensor if tensor.dtype == dtype else tensor.to(dtype)
+
+
+def frame_to_uint8(frame):
+    """单帧 [H,W,C] (任意浮点精度) 转为 uint8 numpy 数组，只在这一帧上临时使用 float32。"""
+    return frame.detach().cpu().float().mul(255.0).clamp_(0, 255).to(torch.uint8).numpy()
+
+
+def images_to_uint8(images):
+    """整个批次 [N,H,W,C] 逐帧转为 uint8 numpy 数组。"""
+    out = np.empty(tuple(images.shape), dtype=np.uint8)
+    for i in range(images.shape[0]):
+        out[i] = frame_to_uint8(images[i])
+    return out
@@ -0,0 +1,68 @@
+# 文件: image_prefetch.py (队列预取: 查看等待中的任务，提前把加载节点要读的图片解码进解码缓存)
+#
+# 后台线程定期读取 ComfyUI 的任务队列，按执行顺序对等待中的任务调用 planner(prompt)，得到
+# (路径, 解码参数, 解码函数) 列表；前 lookahead 张尚未缓存的图片在后台解码，总量不超过内存预算。
+# 任务真正执行时加载节点直接命中缓存，不再在执行路径上等待磁盘读取和解码。
+
+import threading
+
+from .image_cache import get_image_cache, tensor_bytes
+
+
+class QueuePrefetcher:
+    def __init__(self, planner, lookahead=8, budget_bytes=512 * 1024 * 1024, interval=1.0):
+        self.planner = planner
+        self.lookahead = lookahead
+        self.budget_bytes = budget_bytes
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._run, name="supernova-image-prefetch", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.prefetch(self.pending_prompts())
+            except Exception as e:
+                print(f"图片预取失败: {e}")
+
+    @staticmethod
+    def pending_prompts():
+        """按执行顺序返回等待中的任务的 prompt (不含正在执行的任务)。"""
+        from server import PromptServer
+        queue = getattr(PromptServer.instance, "prompt_queue", None)
+        if queue is None or queue.get_tasks_remaining() == 0:
+            return []
+        # 新版 ComfyUI 提供不复制队列的版本
+        get_queue = getattr(queue, "get_current_queue_volatile", queue.get_current_queue)
+        _, pending = get_queue()
+        return [item[2] for item in sorted(pending, key=lambda item: item[0])]
+
+    def prefetch(self, prompts):
+        cache = get_image_cache()
+        if cache.max_bytes <= 0:
+            return
+        # 预取的图片不应把缓存中一半以上的内容挤出去
+        budget = min(self.budget_bytes, cache.max_bytes // 2)
+        seen, used = set(), 0
+        for prompt in prompts:
+            for path, options, loader in self.planner(prompt):
+                if (path, options) in seen:
+                    continue
+                seen.add((path, options))
+                if len(seen) > self.lookahead or used >= budget or self.stop_event.is_set():
+                    return
+                if cache.contains(path, options):
+                    continue
+                try:
+                    used += tensor_bytes(cache.get_or_load(path, options, loader))
+                except Exception as e:
+                    print(f"图片预取: 解码 '{path}' 失败: {e}")
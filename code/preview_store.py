@@ -0,0 +1,129 @@
+# 文件: preview_store.py (统一的预览文件存储: temp/supernova_previews 下按内容寻址，总大小超限时按最近访问时间淘汰)
+#
+# 条目名由源文件的 stat 指纹 (路径, 大小, mtime_ns, inode) + 预览类型 + 参数决定，源文件变化后自然生成新条目。
+# 所有预览生产者 (原图/原视频的链接、处理后的视频、单帧、缩略图) 都通过这里写入，前端用
+# /view?type=temp&subfolder=supernova_previews 读取。容量在 config.json 中用 "preview_store_mb" 设置 (默认 2048)。
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import folder_paths
+
+from .file_fingerprint import stat_key
+from .supernova_config import get_setting
+
+PREVIEW_SUBFOLDER = "supernova_previews"
+DEFAULT_STORE_MB = 2048
+# 淘汰时清理到容量的这个比例，避免每次写入都触发淘汰
+EVICT_TARGET_RATIO = 0.8
+
+
+class PreviewStore:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.access = {}
+        self.lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+    def entry_name(self, source, kind, ext, **params):
+        """预览条目的文件名，源文件不存在时抛出 FileNotFoundError。"""
+        fingerprint = stat_key(source)
+        if fingerprint is None:
+            raise FileNotFoundError(source)
+        raw = repr((fingerprint, kind, sorted(params.items())))
+        return f"{kind}_{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]}{ext}"
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def lookup(self, name):
+        """已存在的条目返回其路径并记录访问时间，否则返回 None。"""
+        path = self.path(name)
+        if not os.path.exists(path):
+            return None
+        with self.lock:
+            self.access[name] = time.time()
+        return path
+
+    def produce(self, name, producer):
+        """返回条目路径；不存在时调用 producer(临时路径) 生成，完成后原子地放入存储并检查容量。"""
+        path = self.lookup(name)
+        if path is not None:
+            return path
+        stem, ext = os.path.splitext(name)
+        # 临时文件保留原扩展名，imageio 等按扩展名判断格式
+        tmp_path = self.path(f"{stem}.{uuid.uuid4().hex[:8]}.tmp{ext}")
+        try:
+            producer(tmp_path)
+            os.replace(tmp_path, self.path(name))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        with self.lock:
+            self.access[name] = time.time()
+        self.enforce()
+        return self.path(name)
+
+    def ensure(self, source, kind, ext, producer, **params):
+        """按源文件和参数取得 (或生成) 预览，返回条目文件名。"""
+        name = self.entry_name(source, kind, ext, **params)
+        self.produce(name, producer)
+        return name
+
+    def link(self, source, kind="original"):
+        """把源文件硬链接 (失败时复制) 进存储，返回条目文件名。"""
+        def producer(tmp_path):
+            try:
+                os.link(source, tmp_path)
+            except OSError:
+                shutil.copy(source, tmp_path)
+        return self.ensure(source, kind, os.path.splitext(source)[1].lower(), producer)
+
+    def enforce(self):
+        """总大小超过上限时，按最近访问时间从旧到新删除条目。"""
+        if self.max_bytes <= 0:
+            return
+        with self.lock:
+            entries, total = [], 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.is_file() or ".tmp" in entry.name:
+                        continue
+                    st = entry.stat()
+                    entries.append((self.access.get(entry.name, st.st_mtime), entry.name, st.st_size))
+                    total += st.st_size
+            if total <= self.max_bytes:
+                return
+            target = self.max_bytes * EVICT_TARGET_RATIO
+            for _, name, size in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(self.path(name))
+                except OSError:
+                    continue
+                self.access.pop(name, None)
+                total -= size
+
+    @staticmethod
+    def view_info(name, fmt):
+        """前端 /view 所需的参数。"""
+        return {"filename": name, "subfolder": PREVIEW_SUBFOLDER, "type": "temp", "format": fmt}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_preview_store():
+    global _store
+    with _store_lock:
+        directory = os.path.join(folder_paths.get_temp_directory(), PREVIEW_SUBFOLDER)
+        if _store is None or _store.directory != directory:
+            _store = PreviewStore(directory, int(get_setting("preview_store_mb", DEFAULT_STORE_MB)) * 1024 * 1024)
+        return _store
@@ -0,0 +1,41 @@
+# 文件: supernova_config.py (插件级配置与数据目录: 读取根目录的 config.json，提供持久化数据的存放位置)
+
+import json
+import os
+
+import folder_paths
+
+NODE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(NODE_ROOT, "config.json")
+
+_config_cache = {"mtime": None, "data": {}}
+
+
+def get_config():
+    """读取 config.json (按修改时间缓存)，文件不存在或格式错误时返回空字典。"""
+    try:
+        mtime = os.path.getmtime(CONFIG_PATH)
+    except OSError:
+        return {}
+    if _config_cache["mtime"] != mtime:
+        try:
+            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+                _config_cache["data"] = json.load(f)
+        except Exception as e:
+            print(f"读取 config.json 失败: {e}")
+            _config_cache["data"] = {}
+        _config_cache["mtime"] = mtime
+    return _config_cache["data"]
+
+
+def get_setting(key, default=None):
+    return get_config().get(key, default)
+
+
+def get_data_dir(*parts):
+    """插件的持久化数据目录 (ComfyUI user 目录下的 supernova 文件夹)，不存在时自动创建。"""
+    get_user_directory = getattr(folder_paths, "get_user_directory", None)
+    base = os.path.join(get_user_directory(), "supernova") if get_user_directory else os.path.join(NODE_ROOT, "data")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
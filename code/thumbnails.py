@@ -0,0 +1,86 @@
+# 文件: thumbnails.py (预览缩略图: 用降分辨率解码生成节点大小的 WebP/JPEG 缩略图，按源文件 mtime 缓存)
+#
+# JPEG 使用 draft() 在 DCT 阶段直接缩小，其它格式先用 Image.reduce() 做整数倍缩小，最后再精确缩放。
+# 缩略图保存在预览存储中，条目名由源文件指纹 + 尺寸 + 格式决定，源文件变化后自动生成新的缩略图。
+
+import io
+import os
+
+from PIL import Image, ImageOps
+
+from .preview_store import get_preview_store
+
+THUMB_FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+THUMB_MIN_SIDE, THUMB_MAX_SIDE = 16, 4096
+VIDEO_EXTENSIONS = {".mp4", ".webm", ".mkv", ".mov", ".avi"}
+
+
+def open_reduced(path, max_side):
+    """以接近 max_side 的分辨率打开图片 (已按 EXIF 方向旋转)。"""
+    img = Image.open(path)
+    if img.format == "JPEG":
+        img.draft("RGB", (max_side, max_side))
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ("RGB", "RGBA", "L", "LA"):
+        img = img.convert("RGBA" if "transparency" in img.info or "A" in img.getbands() else "RGB")
+    factor = max(img.size) // max_side
+    if factor >= 2:
+        img = img.reduce(factor)
+    return img
+
+
+def read_video_frame(path):
+    import imageio
+    reader = imageio.get_reader(path)
+    try:
+        return Image.fromarray(reader.get_data(0))
+    finally:
+        reader.close()
+
+
+def render_thumbnail(path, max_side, fmt="webp"):
+    """生成缩略图并返回编码后的字节。"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in VIDEO_EXTENSIONS:
+        img = read_video_frame(path)
+    else:
+        img = open_reduced(path, max_side)
+    img.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    pil_format, _ = THUMB_FORMATS[fmt]
+    if pil_format == "JPEG" and img.mode != "RGB":
+        img = img.convert("RGB")
+    elif img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    buf = io.BytesIO()
+    img.save(buf, format=pil_format, quality=85)
+    return buf.getvalue()
+
+
+def get_thumbnail(path, max_side=512, fmt="webp"):
+    """返回 (缩略图路径, 条目名)；缩略图保存在预览存储中，已有时直接返回。"""
+    max_side = max(THUMB_MIN_SIDE, min(THUMB_MAX_SIDE, int(max_side)))
+    if fmt not in THUMB_FORMATS:
+        fmt = "webp"
+    store = get_preview_store()
+
+    def producer(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(render_thumbnail(path, max_side, fmt))
+
+    name = store.ensure(path, "thumb", f".{fmt}", producer, size=max_side, fmt=fmt)
+    return store.path(name), name
+
+
+def source_size(path):
+    """原图尺寸 (已按 EXIF 方向修正)，只读取文件头；视频或无法读取时返回 None。"""
+    if os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS:
+        return None
+    try:
+        with Image.open(path) as img:
+            w, h = img.size
+            if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                w, h = h, w
+            return w, h
+    except Exception:
+        return None
@@ -0,0 +1,103 @@
+# 文件: video_keyframes.py (关键帧索引: 随机读取视频帧时从最近的前一个关键帧开始解码)
+#
+# 第一次随机访问某个视频时，用 ffmpeg 只解码关键帧 (-skip_frame nokey + showinfo) 记录它们的时间戳，
+# 索引以 JSON 保存在数据目录 (user/supernova/video_keyframes)，按源文件 stat 指纹命名，文件变化后自动重建。
+# 读取第 n 帧时输入 -ss 直接跳到该帧之前的关键帧，再用输出 -ss 丢弃关键帧到目标帧之间的少量帧。
+
+import bisect
+import hashlib
+import json
+import os
+import re
+import subprocess
+import threading
+from collections import OrderedDict
+
+import imageio_ffmpeg
+
+from .file_fingerprint import stat_key
+from .supernova_config import get_data_dir
+from .video_reader import iter_ffmpeg_frames
+
+INDEX_VERSION = 1
+MAX_MEMORY_ENTRIES = 256
+PTS_TIME_RE = re.compile(r"pts_time:\s*(-?[\d.]+)")
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+def scan_keyframes(path):
+    """只解码关键帧，返回它们的时间戳 (秒，升序)。"""
+    cmd = [imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-nostats", "-skip_frame", "nokey", "-i", path,
+           "-map", "0:v:0", "-vf", "showinfo", "-f", "null", "-"]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    times = []
+    for line in result.stderr.decode("utf-8", errors="replace").splitlines():
+        if "showinfo" in line:
+            match = PTS_TIME_RE.search(line)
+            if match:
+                times.append(float(match.group(1)))
+    return sorted(set(times))
+
+
+def index_path(key):
+    name = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:20]
+    return os.path.join(get_data_dir("video_keyframes"), f"{name}.json")
+
+
+def get_keyframes(path):
+    """视频的关键帧时间戳列表；依次查找内存、磁盘上的索引，都没有时扫描并保存。"""
+    key = stat_key(path)
+    if key is None:
+        raise FileNotFoundError(path)
+    with _lock:
+        keyframes = _memory.get(key)
+        if keyframes is not None:
+            _memory.move_to_end(key)
+            return keyframes
+
+    file_path = index_path(key)
+    keyframes = None
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_VERSION and data.get("source") == list(key):
+            keyframes = data["keyframes"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if keyframes is None:
+        keyframes = scan_keyframes(path)
+        # 预览接口在线程池中并发调用，临时文件名按线程区分
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "source": list(key), "keyframes": keyframes}, f)
+            os.replace(tmp_path, file_path)
+        except OSError as e:
+            print(f"关键帧索引: 保存 '{file_path}' 失败: {e}")
+
+    with _lock:
+        _memory[key] = keyframes
+        while len(_memory) > MAX_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+    return keyframes
+
+
+def read_frame(path, index, fps):
+    """读取第 index 帧 (从 0 开始，按恒定帧率换算时间)；超出视频末尾时返回 None。"""
+    target = index / fps
+    keyframes = get_keyframes(path)
+    pos = bisect.bisect_right(keyframes, target) - 1
+    keyframe = keyframes[pos] if pos >= 0 else 0.0
+    # 退半帧，避免浮点误差跳过目标帧
+    offset = target - keyframe - 0.5 / fps
+
+    input_params = ["-noaccurate_seek", "-ss", f"{keyframe:.6f}"] if keyframe > 0 else []
+    output_params = (["-ss", f"{offset:.6f}"] if offset > 0 else []) + ["-frames:v", "1"]
+    frames = iter_ffmpeg_frames(path, input_params, output_params)
+    try:
+        return next(frames, None)
+    finally:
+        frames.close()
@@ -0,0 +1,89 @@
+# 文件: video_probe.py (视频元数据探测: 用自带的 ffmpeg 读取容器信息，按 stat 指纹缓存)
+#
+# 只运行 `ffmpeg -i` 解析容器头 (不解码视频流)，得到分辨率、fps、时长、帧数 (由时长 x fps 估算)、
+# 旋转和是否有音频。结果按 (path, size, mtime_ns, inode) 缓存，文件变化后自动重新探测。
+
+import re
+import subprocess
+import threading
+from collections import OrderedDict
+
+import imageio_ffmpeg
+
+from .file_fingerprint import stat_key
+
+MAX_CACHE_ENTRIES = 1024
+PROBE_TIMEOUT = 30
+
+DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+VIDEO_STREAM_RE = re.compile(r"Stream #\S+.*?: Video: (\w+).*?,\s*(\d+)x(\d+)")
+FPS_RE = re.compile(r"([\d.]+)(k?) (fps|tbr)")
+ROTATE_RE = re.compile(r"rotate\s*:\s*(-?\d+)|rotation of (-?[\d.]+) degrees")
+AUDIO_STREAM_RE = re.compile(r"Stream #\S+.*?: Audio: (\w+)")
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def parse_ffmpeg_info(text):
+    """解析 `ffmpeg -i` 的 stderr 输出；找不到视频流时抛出 ValueError。"""
+    video = VIDEO_STREAM_RE.search(text)
+    if video is None:
+        raise ValueError("未找到视频流")
+    line_end = text.find("\n", video.start())
+    line = text[video.start():line_end if line_end != -1 else None]
+    width, height = int(video.group(2)), int(video.group(3))
+
+    rates = {kind: float(value) * (1000 if k else 1) for value, k, kind in FPS_RE.findall(line)}
+    fps = rates.get("fps") or rates.get("tbr") or 0.0
+
+    duration = None
+    match = DURATION_RE.search(text)
+    if match:
+        h, m, s = match.groups()
+        duration = int(h) * 3600 + int(m) * 60 + float(s)
+
+    rotation = 0
+    match = ROTATE_RE.search(text)
+    if match:
+        rotation = int(round(abs(float(match.group(1) or match.group(2))))) % 360
+    # ffmpeg 解码时会自动旋转，输出帧的宽高与显示方向一致
+    if rotation in (90, 270):
+        width, height = height, width
+
+    audio = AUDIO_STREAM_RE.search(text)
+    return {
+        "width": width,
+        "height": height,
+        "fps": fps,
+        "duration": duration,
+        "frame_count": int(round(duration * fps)) if duration and fps else None,
+        "codec": video.group(1),
+        "rotation": rotation,
+        "has_audio": audio is not None,
+        "audio_codec": audio.group(1) if audio else None,
+    }
+
+
+def run_probe(path):
+    result = subprocess.run([imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-i", path],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=PROBE_TIMEOUT)
+    return parse_ffmpeg_info(result.stderr.decode("utf-8", errors="replace"))
+
+
+def probe_video(path):
+    """返回视频的元数据字典 (见 parse_ffmpeg_info)，文件不存在时抛出 FileNotFoundError。"""
+    key = stat_key(path)
+    if key is None:
+        raise FileNotFoundError(path)
+    with _lock:
+        info = _cache.get(key)
+        if info is not None:
+            _cache.move_to_end(key)
+            return dict(info)
+    info = run_probe(path)
+    with _lock:
+        _cache[key] = info
+        while len(_cache) > MAX_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return dict(info)
@@ -0,0 +1,106 @@
+# 文件: video_reader.py (按条件读取视频帧: 跳过开头用 ffmpeg 的输入 -ss，抽帧用 select 滤镜，不需要的帧不会送进 Python)
+#
+# 输入 -ss 先跳到前一个关键帧再精确解码到目标时间，开头的帧只在 ffmpeg 内部解码、不做格式转换和传输；
+# select_every_nth 由 select 滤镜完成，-vsync 0 保证不补帧。
+
+import math
+
+import imageio_ffmpeg
+import numpy as np
+import torch
+
+# 帧数未知或估计偏小时，缓冲区至少增长的帧数 (否则按当前大小的一半增长)
+MIN_GROW_FRAMES = 64
+
+
+def selection_window(fps, skip_frames=0, start_time=0.0, end_time=0.0):
+    """把起始时间 + 跳过的帧数、结束时间换算成 ffmpeg 的 (seek 秒数, 时长)；没有结束时间时时长为 None。"""
+    start = max(0.0, float(start_time))
+    if skip_frames > 0:
+        # 退半帧，避免浮点误差把第 skip_frames 帧也跳过
+        start += (skip_frames - 0.5) / fps
+    duration = max(0.0, float(end_time) - start) if end_time > 0 else None
+    return start, duration
+
+
+def iter_video_frames(path, fps, skip_frames=0, select_every_nth=1, frame_load_cap=0, start_time=0.0, end_time=0.0):
+    """逐帧产出选中的帧 (uint8 [H,W,3])，读够 frame_load_cap 帧后立即结束 ffmpeg。"""
+    start, duration = selection_window(fps, skip_frames, start_time, end_time)
+    if duration is not None and duration <= 0:
+        return
+    input_params = ["-ss", f"{start:.6f}"] if start > 0 else []
+    output_params = []
+    if duration is not None:
+        output_params += ["-t", f"{duration:.6f}"]
+    if select_every_nth > 1:
+        output_params += ["-vf", f"select=not(mod(n\\,{int(select_every_nth)}))", "-vsync", "0"]
+
+    frames = iter_ffmpeg_frames(path, input_params, output_params)
+    try:
+        count = 0
+        for frame in frames:
+            yield frame
+            count += 1
+            if frame_load_cap > 0 and count >= frame_load_cap:
+                break
+    finally:
+        frames.close()
+
+
+def iter_ffmpeg_frames(path, input_params=None, output_params=None):
+    """用 imageio_ffmpeg 逐帧读取 RGB 帧 (uint8 [H,W,3])；生成器关闭时结束 ffmpeg 进程。
+
+    meta["size"] 取自 ffmpeg 输出流 (rawvideo)，已经包含自动旋转和滤镜后的宽高。
+    """
+    gen = imageio_ffmpeg.read_frames(path, input_params=input_params or [], output_params=output_params or [])
+    try:
+        meta = next(gen)
+        w, h = meta["size"]
+        for data in gen:
+            if len(data) != w * h * 3:
+                raise ValueError(f"ffmpeg 输出的帧大小 ({len(data)} 字节) 与 {w}x{h} 不符")
+            yield np.frombuffer(bytearray(data), dtype=np.uint8).reshape(h, w, 3)
+    finally:
+        gen.close()
+
+
+def estimate_frame_count(fps, duration, skip_frames=0, select_every_nth=1, frame_load_cap=0, start_time=0.0, end_time=0.0):
+    """由容器时长估算选中的帧数；时长未知且没有 frame_load_cap 时返回 None。
+
+    按整帧计算 (不含 selection_window 为 seek 退的半帧)，不足一帧的部分向下取整，
+    因此估计值不会因为舍入比实际解码的帧数多。
+    """
+    if not duration or not math.isfinite(duration):
+        return frame_load_cap if frame_load_cap > 0 else None
+    total = math.floor(duration * fps + 1e-6)
+    first = math.ceil(max(0.0, float(start_time)) * fps - 1e-6) + max(0, int(skip_frames))
+    last = min(total, math.floor(float(end_time) * fps + 1e-6)) if end_time > 0 else total
+    available = max(0, last - first)
+    nth = max(1, int(select_every_nth))
+    count = (available + nth - 1) // nth
+    return min(count, frame_load_cap) if frame_load_cap > 0 else count
+
+
+def read_video_tensor(path, fps, skip_frames=0, select_every_nth=1, frame_load_cap=0, start_time=0.0, end_time=0.0,
+                      dtype=torch.float32, duration=None):
+    """读取选中的帧，逐帧转换进预分配的 [N,H,W,3] 张量；没有帧时返回 None。
+
+    缓冲区按估算帧数一次分配，估计偏小时原地扩容 (resize_ 保留已有数据)；估计偏大时返回前 count 帧的视图，
+    多出的少量帧留在存储里而不是重新分配复制，峰值内存约等于最终张量，不会再有一份 float32 的帧列表。
+    """
+    expected = estimate_frame_count(fps, duration, skip_frames, select_every_nth, frame_load_cap, start_time, end_time)
+    buf, count = None, 0
+    for frame in iter_video_frames(path, fps, skip_frames, select_every_nth, frame_load_cap, start_time, end_time):
+        h, w = frame.shape[:2]
+        if buf is None:
+            buf = torch.empty((max(1, expected or MIN_GROW_FRAMES), h, w, 3), dtype=dtype)
+        elif count == buf.shape[0]:
+            buf.resize_((count + max(MIN_GROW_FRAMES, count // 2), h, w, 3))
+        buf[count].copy_(torch.from_numpy(frame)).div_(255.0)
+        count += 1
+    if buf is None:
+        return None
+    if count < buf.shape[0]:
+        # 缩小 CPU 存储会分配新缓冲区并复制，峰值翻倍；这里只截取视图
+        buf = buf.narrow(0, 0, count)
+    return buf
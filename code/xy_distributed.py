@@ -0,0 +1,231 @@
+# 文件: xy_distributed.py (XY Plot 分布式执行: 把单元格计划切分给多个 ComfyUI worker 实例)
+#
+# 每个分片被转换成一个标准的 ComfyUI API 工作流 (CheckpointLoaderSimple -> LoraLoader -> CLIPTextEncode
+# -> KSampler -> VAEDecode -> PreviewImage)，通过 worker 的 HTTP `/prompt` 接口提交，
+# 然后轮询 `/history/{prompt_id}`，最后用 `/view` 取回每个单元格的 PNG 数据。
+# 本模块只依赖标准库，方便用一个本地的替身服务器进行测试。
+
+import json
+import threading
+import time
+import uuid
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+# ======================================================================
+#  工具函数
+# ======================================================================
+
+def parse_worker_urls(text):
+    """解析 worker 地址列表 (逗号或换行分隔)，缺省协议时补全为 http://。"""
+    urls = []
+    for part in str(text or "").replace(",", "\n").splitlines():
+        part = part.strip().rstrip("/")
+        if not part:
+            continue
+        if "://" not in part:
+            part = "http://" + part
+        if part not in urls:
+            urls.append(part)
+    return urls
+
+
+def shard_plan(cells, shard_count):
+    """把单元格切分成连续的分片。
+
+    先按 Checkpoint 稳定排序，使相同 Checkpoint 的单元格尽量落在同一个 worker 上，
+    避免每个 worker 都要加载全部模型。
+    """
+    if not cells:
+        return []
+    ordered = sorted(cells, key=lambda c: str(c.get("ckpt_name") or ""))
+    shard_count = max(1, min(shard_count, len(ordered)))
+    size, extra = divmod(len(ordered), shard_count)
+    shards, start = [], 0
+    for i in range(shard_count):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(ordered[start:end])
+        start = end
+    return shards
+
+
+def _request(url, payload=None, timeout=30):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    headers = {"Content-Type": "application/json"} if data is not None else {}
+    req = urllib.request.Request(url, data=data, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.read()
+    except urllib.error.HTTPError as e:
+        detail = e.read().decode("utf-8", errors="replace")
+        raise RuntimeError(f"{url} 返回 HTTP {e.code}: {detail[:500]}") from e
+
+
+def _request_json(url, payload=None, timeout=30):
+    return json.loads(_request(url, payload, timeout).decode("utf-8"))
+
+
+# ======================================================================
+#  工作流构建
+# ======================================================================
+
+def build_shard_graph(cells, base_ckpt, latent_info):
+    """把一组单元格转换成 ComfyUI API 格式的工作流。
+
+    返回 (graph, output_nodes)，output_nodes 为 {单元格序号: PreviewImage 节点 id}。
+    相同的 Checkpoint 和空 Latent 在同一个工作流内只创建一次。
+    """
+    graph, ckpt_nodes, output_nodes = {}, {}, {}
+
+    def ckpt_node(name):
+        if name not in ckpt_nodes:
+            node_id = f"ckpt_{len(ckpt_nodes)}"
+            graph[node_id] = {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": name}}
+            ckpt_nodes[name] = node_id
+        return ckpt_nodes[name]
+
+    graph["latent"] = {
+        "class_type": latent_info.get("class_type", "EmptyLatentImage"),
+        "inputs": {
+            "width": latent_info["width"],
+            "height": latent_info["height"],
+            "batch_size": latent_info.get("batch_size", 1),
+        },
+    }
+
+    for cell in cells:
+        prefix = f"cell_{cell['index']}_"
+        ckpt_id = ckpt_node(cell.get("ckpt_name") or base_ckpt)
+        model, clip, vae = [ckpt_id, 0], [ckpt_id, 1], [ckpt_id, 2]
+
+        for j, (lora_name, model_str, clip_str) in enumerate(cell.get("lora_stack") or []):
+            node_id = f"{prefix}lora_{j}"
+            graph[node_id] = {"class_type": "LoraLoader", "inputs": {
+                "model": model, "clip": clip, "lora_name": lora_name,
+                "strength_model": model_str, "strength_clip": clip_str,
+            }}
+            model, clip = [node_id, 0], [node_id, 1]
+
+        if cell.get("vae_name"):
+            graph[f"{prefix}vae"] = {"class_type": "VAELoader", "inputs": {"vae_name": cell["vae_name"]}}
+            vae = [f"{prefix}vae", 0]
+
+        graph[f"{prefix}pos"] = {"class_type": "CLIPTextEncode", "inputs": {"text": cell["positive"], "clip": clip}}
+        graph[f"{prefix}neg"] = {"class_type": "CLIPTextEncode", "inputs": {"text": cell["negative"], "clip": clip}}
+        graph[f"{prefix}sampler"] = {"class_type": "KSampler", "inputs": {
+            "model": model, "seed": cell["seed"], "steps": cell["steps"], "cfg": cell["cfg"],
+            "sampler_name": cell["sampler_name"], "scheduler": cell["scheduler"],
+            "positive": [f"{prefix}pos", 0], "negative": [f"{prefix}neg", 0],
+            "latent_image": ["latent", 0], "denoise": cell["denoise"],
+        }}
+        graph[f"{prefix}decode"] = {"class_type": "VAEDecode", "inputs": {"samples": [f"{prefix}sampler", 0], "vae": vae}}
+        graph[f"{prefix}out"] = {"class_type": "PreviewImage", "inputs": {"images": [f"{prefix}decode", 0]}}
+        output_nodes[cell["index"]] = f"{prefix}out"
+
+    return graph, output_nodes
+
+
+# ======================================================================
+#  提交与结果收集
+# ======================================================================
+
+class ShardCancelled(Exception):
+    """分片因本地任务被中断而取消。"""
+
+
+def cancel_prompt(worker_url, prompt_id):
+    """从 worker 的队列中删除分片的任务；已经在执行时中断它。"""
+    for path, payload in (("/queue", {"delete": [prompt_id]}), ("/interrupt", {"prompt_id": prompt_id})):
+        try:
+            _request(f"{worker_url}{path}", payload, timeout=10)
+        except Exception as e:
+            print(f"XY Plot 分布式: 取消 {worker_url} 上的任务失败: {e}")
+
+
+def run_shard(worker_url, cells, base_ckpt, latent_info, timeout=3600, poll_interval=1.0, cancel_event=None):
+    """在一个 worker 上执行一个分片，返回 {单元格序号: [PNG 字节, ...]}。
+
+    cancel_event 被设置后，取消 worker 上的任务并抛出 ShardCancelled。
+    """
+    graph, output_nodes = build_shard_graph(cells, base_ckpt, latent_info)
+    resp = _request_json(f"{worker_url}/prompt", {"prompt": graph, "client_id": uuid.uuid4().hex})
+    if resp.get("node_errors"):
+        raise RuntimeError(f"{worker_url} 拒绝了工作流: {json.dumps(resp['node_errors'])[:500]}")
+    prompt_id = resp["prompt_id"]
+
+    deadline = time.time() + timeout
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            cancel_prompt(worker_url, prompt_id)
+            raise ShardCancelled(worker_url)
+        entry = _request_json(f"{worker_url}/history/{urllib.parse.quote(str(prompt_id))}").get(prompt_id)
+        if entry:
+            status = entry.get("status") or {}
+            if status.get("status_str") == "error":
+                raise RuntimeError(f"{worker_url} 执行失败: {json.dumps(status.get('messages', []))[:500]}")
+            if status.get("completed", True):
+                break
+        if time.time() > deadline:
+            cancel_prompt(worker_url, prompt_id)
+            raise TimeoutError(f"{worker_url} 在 {timeout} 秒内未完成分片")
+        if cancel_event is not None:
+            cancel_event.wait(poll_interval)
+        else:
+            time.sleep(poll_interval)
+
+    results = {}
+    outputs = entry.get("outputs") or {}
+    for index, node_id in output_nodes.items():
+        blobs = []
+        for img in (outputs.get(node_id) or {}).get("images", []):
+            query = urllib.parse.urlencode({
+                "filename": img["filename"],
+                "subfolder": img.get("subfolder", ""),
+                "type": img.get("type", "temp"),
+            })
+            blobs.append(_request(f"{worker_url}/view?{query}", timeout=120))
+        if blobs:
+            results[index] = blobs
+    return results
+
+
+def run_distributed(cells, worker_urls, base_ckpt, latent_info, timeout=3600, poll_interval=1.0, check_interrupt=None):
+    """把单元格分片并行提交给所有 worker，合并返回 {单元格序号: [PNG 字节, ...]}。
+
+    单个 worker 失败只会打印错误，对应的单元格不会出现在结果中，由调用方在本地补算。
+    check_interrupt 在调用线程中定期执行；它抛出的异常 (例如用户中断) 会先取消所有 worker 上
+    未完成的任务，再原样抛给调用方。
+    """
+    shards = shard_plan(cells, len(worker_urls))
+    results = {}
+    if not shards:
+        return results
+
+    cancel_event = threading.Event()
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        futures = {
+            pool.submit(run_shard, url, shard, base_ckpt, latent_info, timeout, poll_interval, cancel_event): url
+            for url, shard in zip(worker_urls, shards)
+        }
+        pending = set(futures)
+        try:
+            while pending:
+                if check_interrupt:
+                    check_interrupt()
+                done, pending = wait(pending, timeout=poll_interval)
+                for future in done:
+                    url = futures[future]
+                    try:
+                        shard_results = future.result()
+                        results.update(shard_results)
+                        print(f"XY Plot 分布式: {url} 完成 {len(shard_results)} 个单元格")
+                    except Exception as e:
+                        print(f"XY Plot 分布式: worker {url} 失败，相关单元格将在本地生成: {e}")
+        except BaseException:
+            # 各分片线程看到取消信号后删除/中断自己在 worker 上的任务；退出 with 时等待它们完成
+            cancel_event.set()
+            raise
+    return results
@@ -0,0 +1,206 @@
+# 文件: xy_memory.py (XY Plot 内存预算调度: 按计划释放 Checkpoint/VAE 和单元格克隆，并统计每格峰值内存)
+
+import gc
+import threading
+from collections import Counter
+
+import torch
+import comfy.model_management
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+GB = 1024 ** 3
+
+
+# ======================================================================
+#  内存统计
+# ======================================================================
+
+def process_ram():
+    """当前进程的常驻内存 (字节)，没有 psutil 时返回 0。"""
+    if psutil is None:
+        return 0
+    return psutil.Process().memory_info().rss
+
+
+def device_vram():
+    """当前 CUDA 设备上 PyTorch 已分配的显存 (字节)。"""
+    if torch.cuda.is_available():
+        return torch.cuda.memory_allocated()
+    return 0
+
+
+def release_memory(unload_models=False, patchers=()):
+    """回收 Python 对象并清空显存缓存。
+
+    unload_models=True 时卸载 ComfyUI 已加载的所有模型；给出 patchers 时只卸载它们 (及其克隆)。
+    """
+    gc.collect()
+    if unload_models:
+        comfy.model_management.unload_all_models()
+    elif patchers:
+        unload_patchers(patchers)
+    comfy.model_management.soft_empty_cache()
+
+
+def resource_patchers(resource):
+    """资源 (MODEL/CLIP/VAE 或 Checkpoint 的三元组) 中的 ModelPatcher 列表。"""
+    items = resource if isinstance(resource, (tuple, list)) else (resource,)
+    patchers = []
+    for item in items:
+        patcher = getattr(item, "patcher", item)
+        if hasattr(patcher, "is_clone"):
+            patchers.append(patcher)
+    return patchers
+
+
+def same_model(a, b):
+    return a is b or a.is_clone(b)
+
+
+def unload_patchers(patchers):
+    """从 ComfyUI 的已加载列表中卸载属于 patchers 的模型 (包括单元格里 LoRA 产生的克隆)。"""
+    loaded_models = comfy.model_management.current_loaded_models
+    for i in reversed(range(len(loaded_models))):
+        model = loaded_models[i].model
+        if model is not None and any(same_model(model, p) for p in patchers):
+            loaded_models.pop(i).model_unload()
+
+
+class PeakMemoryMonitor:
+    """在 with 代码块执行期间采样进程 RAM 与 CUDA 显存的峰值。"""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak_ram = 0
+        self.peak_vram = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak_ram = process_ram()
+        if torch.cuda.is_available():
+            torch.cuda.reset_peak_memory_stats()
+        if psutil is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_ram = max(self.peak_ram, process_ram())
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.peak_ram = max(self.peak_ram, process_ram())
+        if torch.cuda.is_available():
+            self.peak_vram = torch.cuda.max_memory_allocated()
+        return False
+
+
+# ======================================================================
+#  单元格资源调度
+# ======================================================================
+
+class CellResourceScheduler:
+    """按单元格计划管理 Checkpoint 与 VAE 的生命周期。
+
+    计划按 Checkpoint 分组执行，每个资源记录剩余的使用次数，最后一个用到它的单元格结束后立即释放，
+    因此任一时刻最多只有一个额外的 Checkpoint 常驻。释放时只卸载调度器自己加载的模型，
+    keep 中的模型 (节点输入的 MODEL/CLIP/VAE) 以及仍被其他资源共用的组件不受影响。
+    设置了预算 (GB, 0 为不限) 时：RAM 超出预算会丢弃调度器持有的、当前单元格没有用到的资源 (之后用到时重新加载)；
+    VRAM 超出预算会卸载 ComfyUI 缓存的模型，每加载一个新资源最多卸载一次，不会在持续超出时逐格重复。
+    """
+
+    def __init__(self, plan, loaders, ram_budget_gb=0, vram_budget_gb=0, keep=()):
+        self.loaders = loaders
+        self.keep = resource_patchers(keep)
+        self.ram_budget = ram_budget_gb * GB
+        self.vram_budget = vram_budget_gb * GB
+        self.loaded = {}
+        # 当前单元格已经取用的资源，RAM 超出预算时不会被丢弃
+        self.in_use = set()
+        # 自上次加载新资源以来是否已经为 VRAM 预算卸载过模型
+        self.vram_released = False
+        self.remaining = Counter()
+        for cell in plan:
+            for key in self.resource_keys(cell):
+                self.remaining[key] += 1
+
+    @staticmethod
+    def resource_keys(cell):
+        keys = []
+        if cell.get("ckpt_name"): keys.append(("ckpt", cell["ckpt_name"]))
+        if cell.get("vae_name"): keys.append(("vae", cell["vae_name"]))
+        return keys
+
+    @staticmethod
+    def execution_order(plan, group_key=None):
+        """稳定地按 Checkpoint 分组，同一 Checkpoint 的单元格连续执行。
+
+        给出 group_key 时，同一 Checkpoint 内 group_key 相同的单元格也会排在一起。
+        """
+        first_seen = {}
+        if group_key is not None:
+            for cell in plan:
+                first_seen.setdefault(group_key(cell), len(first_seen))
+        return sorted(plan, key=lambda c: (str(c.get("ckpt_name") or ""), first_seen.get(group_key(c), 0) if group_key else 0))
+
+    def enforce_budget(self, evict=False):
+        """超出预算时释放内存。
+
+        卸载模型只会把权重从显存移回内存，对 RAM 预算无济于事；RAM 超出时 (evict=True) 丢弃调度器持有的其它资源并回收。
+        VRAM 超出时卸载 ComfyUI 已加载的模型，直到下一次加载新资源之前不再重复卸载。
+        """
+        if evict and self.ram_budget and process_ram() > self.ram_budget:
+            evicted = [self.loaded.pop(key) for key in list(self.loaded) if key not in self.in_use]
+            if evicted:
+                print(f"XY Plot: 内存超出预算，释放 {len(evicted)} 个暂时不用的 Checkpoint/VAE。")
+                release_memory(patchers=self.owned_patchers(evicted))
+        if self.vram_budget and not self.vram_released and device_vram() > self.vram_budget:
+            print("XY Plot: 显存超出预算，卸载已缓存的模型。")
+            release_memory(unload_models=True)
+            self.vram_released = True
+
+    def get(self, kind, name):
+        """取得已加载的资源，必要时调用对应的加载函数 (加载失败返回 None)。"""
+        key = (kind, name)
+        if key not in self.loaded:
+            self.enforce_budget(evict=True)
+            self.loaded[key] = self.loaders[kind](name)
+            self.vram_released = False
+        self.in_use.add(key)
+        return self.loaded[key]
+
+    def owned_patchers(self, resources):
+        """resources 中由调度器加载、且没有被保留或仍被其他已加载资源共用的 ModelPatcher。"""
+        kept = self.keep + [p for resource in self.loaded.values() for p in resource_patchers(resource)]
+        return [p for resource in resources for p in resource_patchers(resource)
+                if not any(same_model(p, k) for k in kept)]
+
+    def finish_cell(self, cell):
+        """单元格结束：释放之后不再需要的资源，并检查预算。"""
+        released = []
+        self.in_use.clear()
+        for key in self.resource_keys(cell):
+            self.remaining[key] -= 1
+            if self.remaining[key] <= 0 and key in self.loaded:
+                released.append(self.loaded.pop(key))
+        patchers = self.owned_patchers(released)
+        if patchers:
+            release_memory(patchers=patchers)
+        elif released or self.ram_budget or self.vram_budget:
+            gc.collect()
+            self.enforce_budget()
+
+    def close(self):
+        released = list(self.loaded.values())
+        self.loaded.clear()
+        patchers = self.owned_patchers(released)
+        if patchers:
+            release_memory(patchers=patchers)
@@ -0,0 +1,233 @@
+# 文件: xy_spec.py (XY Plot 紧凑范围表达式: 解析为取值序列)
+#
+# 支持的写法 (逗号、分号或换行分隔，可带 "seed:" 之类的标签前缀):
+#   数值:   1000..1200 step 7    1..10    linspace(3, 12, 10)    5, 9, 13
+#   名称:   sdxl_*.safetensors   re:^(anime|photo)_   /v\d+/   model_a.safetensors
+#   采样器: dpmpp_*@karras       euler*               (@ 后为调度器，同样支持通配符)
+#   提示词: cat => dog | fox | wolf
+# 数值范围和提示词替换返回只保存参数的 Sequence 对象 (按下标计算元素)，名称和采样器在解析时即与候选列表匹配。
+# XY Plot 执行时会把两个轴一次性展开为完整的单元格计划 (见 build_cell_plan)，这里并不是生成器式的惰性执行。
+
+import fnmatch
+import re
+from collections.abc import Sequence
+
+
+# ======================================================================
+#  按下标计算的序列
+# ======================================================================
+
+class LazyRange(Sequence):
+    """包含终点的等差数列: start, start+step, ... <= stop。"""
+
+    def __init__(self, start, stop, step=1):
+        if step == 0:
+            raise ValueError("step 不能为 0")
+        self.start, self.stop, self.step = start, stop, step
+        count = int((stop - start) / step + 1e-9) + 1
+        self._len = max(0, count)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        value = self.start + index * self.step
+        return round(value, 6) if isinstance(value, float) else value
+
+    def __repr__(self):
+        return f"LazyRange({self.start}..{self.stop} step {self.step})"
+
+
+class LazyLinspace(Sequence):
+    """first 到 last 之间均匀分布的 count 个数 (包含两端)，与 generate_floats 的取值一致。"""
+
+    def __init__(self, first, last, count, as_int=False):
+        self.first, self.last, self.count, self.as_int = first, last, max(0, int(count)), as_int
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        interval = (self.last - self.first) / (self.count - 1) if self.count > 1 else 0
+        value = self.first + index * interval
+        return int(round(value)) if self.as_int else round(value, 3)
+
+    def __repr__(self):
+        return f"LazyLinspace({self.first}, {self.last}, {self.count})"
+
+
+class LazyChain(Sequence):
+    """把多个序列首尾相连，按下标定位到对应的子序列。"""
+
+    def __init__(self, parts):
+        self.parts = list(parts)
+
+    def __len__(self):
+        return sum(len(p) for p in self.parts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0:
+            raise IndexError(index)
+        for part in self.parts:
+            if index < len(part):
+                return part[index]
+            index -= len(part)
+        raise IndexError(index)
+
+    def __repr__(self):
+        return f"LazyChain({self.parts!r})"
+
+
+class LazyMap(Sequence):
+    """对序列的每个元素在取用时才应用 fn。"""
+
+    def __init__(self, fn, seq):
+        self.fn, self.seq = fn, seq
+
+    def __len__(self):
+        return len(self.seq)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.fn(v) for v in self.seq[index]]
+        return self.fn(self.seq[index])
+
+    def __repr__(self):
+        return f"LazyMap({self.seq!r})"
+
+
+# ======================================================================
+#  解析
+# ======================================================================
+
+_LABEL_RE = re.compile(r"^\s*[A-Za-z_][\w ]*:(?!\s*\^)\s*")
+_RANGE_RE = re.compile(r"^(-?[\d.]+)\s*\.\.\s*(-?[\d.]+)(?:\s+step\s+(-?[\d.]+))?$", re.IGNORECASE)
+_LINSPACE_RE = re.compile(r"^linspace\s*\(\s*(-?[\d.]+)\s*,\s*(-?[\d.]+)\s*,\s*(\d+)\s*\)$", re.IGNORECASE)
+
+
+def split_spec(text):
+    """按逗号/分号/换行切分，忽略括号内的逗号。"""
+    parts, depth, current = [], 0, ""
+    for ch in str(text or ""):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth = max(0, depth - 1)
+        if ch in ",;\n" and depth == 0:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+    parts.append(current)
+    return [p.strip() for p in parts if p.strip()]
+
+
+def strip_label(text):
+    """去掉 "seed:" / "cfg:" 之类的标签前缀 (re: 前缀保留)。"""
+    text = str(text or "").strip()
+    if text.lower().startswith("re:"):
+        return text
+    return _LABEL_RE.sub("", text, count=1)
+
+
+def parse_number_spec(text, kind=int):
+    """把数值表达式解析为序列；kind 为 int 或 float。"""
+    parts = []
+    for part in split_spec(strip_label(text)):
+        m = _LINSPACE_RE.match(part)
+        if m:
+            parts.append(LazyLinspace(float(m.group(1)), float(m.group(2)), int(m.group(3)), as_int=(kind is int)))
+            continue
+        m = _RANGE_RE.match(part)
+        if m:
+            start, stop = kind(float(m.group(1))), kind(float(m.group(2)))
+            step = kind(float(m.group(3))) if m.group(3) else kind(1)
+            if stop < start and step > 0:
+                step = -step
+            parts.append(LazyRange(start, stop, step))
+            continue
+        try:
+            parts.append([kind(float(part))])
+        except ValueError:
+            raise ValueError(f"无法解析的范围表达式: '{part}'")
+    return LazyChain(parts)
+
+
+def _compile_pattern(pattern):
+    if pattern.lower().startswith("re:"):
+        return re.compile(pattern[3:].strip()).search
+    if len(pattern) > 2 and pattern.startswith("/") and pattern.endswith("/"):
+        return re.compile(pattern[1:-1]).search
+    if any(ch in pattern for ch in "*?["):
+        return lambda name, p=pattern: fnmatch.fnmatchcase(name, p) or fnmatch.fnmatchcase(name.replace("\\", "/"), p)
+    return lambda name, p=pattern: name == p or name.replace("\\", "/") == p
+
+
+def match_names(patterns, candidates):
+    """按模式顺序从候选列表中挑选名称 (去重，保持候选列表内的顺序)。"""
+    result, seen = [], set()
+    for pattern in patterns:
+        matcher = _compile_pattern(pattern)
+        hits = [name for name in candidates if matcher(name) and name not in seen]
+        if not hits:
+            print(f"XY Plot: 范围表达式 '{pattern}' 没有匹配到任何项目")
+        for name in hits:
+            seen.add(name)
+            result.append(name)
+    return result
+
+
+def parse_name_spec(text, candidates_fn):
+    """名称表达式 (字面量 / 通配符 / 正则)，返回匹配到的名称列表。"""
+    return match_names(split_spec(strip_label(text)), candidates_fn())
+
+
+def parse_sampler_spec(text, samplers_fn, schedulers_fn, target="sampler & scheduler"):
+    """采样器/调度器表达式，返回与 TSC_XYplot_Sampler_Scheduler 相同格式的值序列。"""
+    items = split_spec(strip_label(text))
+    if target == "scheduler":
+        return match_names(items, schedulers_fn())
+
+    pairs = []
+    samplers, schedulers = samplers_fn(), schedulers_fn()
+    for item in items:
+        sampler_pat, _, scheduler_pat = item.partition("@")
+        sampler_hits = match_names([sampler_pat.strip()], samplers)
+        if target == "sampler" or not scheduler_pat.strip():
+            pairs.extend((s, None) for s in sampler_hits)
+        else:
+            scheduler_hits = match_names([scheduler_pat.strip()], schedulers)
+            pairs.extend((s, sc) for s in sampler_hits for sc in scheduler_hits)
+    return pairs
+
+
+def parse_prompt_sr_spec(text):
+    """提示词替换表达式: 每行 "搜索词 => 替换1 | 替换2 | ..."。"""
+    parts = []
+    for line in str(text or "").splitlines():
+        if "=>" not in line:
+            continue
+        search_txt, _, replacements = line.partition("=>")
+        search_txt = search_txt.strip()
+        if not search_txt:
+            continue
+        options = [r.strip() for r in replacements.split("|")]
+        parts.append(LazyMap(lambda r, s=search_txt: (s, r), options))
+    return LazyChain(parts)
+
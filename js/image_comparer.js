@@ -25,6 +25,20 @@ function getImageUrl(data) {
     return api.apiURL(`/view?filename=${encodeURIComponent(data.filename)}&type=${data.type}&subfolder=${data.subfolder}${app.getPreviewFormatParam()}${app.getRandParam()}`);
 }
 
+// 通过缩略图接口加载节点内显示用的图片，原图分辨率来自响应头 X-Image-Size
+const COMPARER_THUMB_SIZE = 1024;
+async function loadThumbnail(data, size = COMPARER_THUMB_SIZE) {
+    const params = new URLSearchParams({ filename: data.filename, type: data.type, subfolder: data.subfolder || "", size: String(size) });
+    const res = await api.fetchApi("/supernova/thumb?" + params.toString());
+    if (!res.ok) throw new Error(`thumb ${res.status}`);
+    const url = URL.createObjectURL(await res.blob());
+    const img = new Image();
+    img.src = url;
+    try { await img.decode(); } finally { URL.revokeObjectURL(url); }
+    img.sourceSize = res.headers.get("X-Image-Size") || `${img.naturalWidth}x${img.naturalHeight}`;
+    return img;
+}
+
 // 动态计算顶部组件占用的高度，确保图片显示区域位置准确
 function getWidgetHeight(node) {
     let height = 30;
@@ -392,16 +406,22 @@ app.registerExtension({
                 // 定义内部图片加载工具函数
                 const load = (key, list) => {
                     if (list?.length > 0) {
-                        const img = new Image();
-                        // 图片异步加载成功后的回调
-                        img.onload = () => {
-                            // 记录图片的原始分辨率，例如 "1024x1024"
-                            this.imgDims[key] = `${img.naturalWidth}x${img.naturalHeight}`;
-                            this.setDirtyCanvas(true, true); // 加载完成后刷新画面
-                        };
-                        // 从消息数据中获取 URL 并开始加载
-                        img.src = getImageUrl(list[0]);
-                        this.imgs[key] = img;
+                        // 优先加载缩略图，失败时回退到原图
+                        loadThumbnail(list[0]).then((img) => {
+                            this.imgs[key] = img;
+                            this.imgDims[key] = img.sourceSize; // 原始分辨率，例如 "1024x1024"
+                            this.setDirtyCanvas(true, true);
+                        }).catch(() => {
+                            const img = new Image();
+                            // 图片异步加载成功后的回调
+                            img.onload = () => {
+                                // 记录图片的原始分辨率，例如 "1024x1024"
+                                this.imgDims[key] = `${img.naturalWidth}x${img.naturalHeight}`;
+                                this.setDirtyCanvas(true, true); // 加载完成后刷新画面
+                            };
+                            img.src = getImageUrl(list[0]);
+                            this.imgs[key] = img;
+                        });
                     } else {
                         // 如果后端未提供该插槽的图片，则清空状态
                         this.imgs[key] = null; this.imgDims[key] = "";
@@ -553,9 +573,11 @@ app.registerExtension({
             if (node && node.comfyClass === "ImageCompareAndSelect") {
                 const load = (key, list) => {
                     if (list?.length > 0) {
-                        const img = new Image();
-                        img.onload = () => { node.imgs[key] = img; node.setDirtyCanvas(true, true); };
-                        img.src = getImageUrl(list[0]);
+                        loadThumbnail(list[0]).then((img) => { node.imgs[key] = img; node.setDirtyCanvas(true, true); }).catch(() => {
+                            const img = new Image();
+                            img.onload = () => { node.imgs[key] = img; node.setDirtyCanvas(true, true); };
+                            img.src = getImageUrl(list[0]);
+                        });
                     }
                 };
                 load(1, detail.images["1"]); load(2, detail.images["2"]);
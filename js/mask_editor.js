@@ -823,7 +823,7 @@ app.registerExtension({
                                     const r = await fetch(api.apiURL("/mape/preview_absolute_path?" + p.toString()));
                                     if (!r.ok) throw new Error("API Error");
                                     const d = await r.json(); 
-                                    url = api.apiURL(`/view?filename=${encodeURIComponent(d.filename)}&type=${d.type}`);
+                                    url = api.apiURL(`/view?filename=${encodeURIComponent(d.filename)}&type=${d.type}&subfolder=${encodeURIComponent(d.subfolder || "")}`);
                                 }
                             } else {
                                 // --- 修复 LoadImageUnified 的子文件夹逻辑 ---
@@ -25,8 +25,61 @@ style.innerHTML = `
 `;
 document.head.appendChild(style);
 
+// 节点内预览使用服务端缩略图 (最长边像素)，不再加载原图
+const PREVIEW_THUMB_SIZE = 768;
+
+// 把服务端推送的文件变化 (带 input/output/temp 前缀) 应用到各图片节点的下拉列表
+function applyFileChanges(node, detail) {
+    const widget = node.widgets?.find(w => w.name === "image");
+    if (!widget?.options?.values) return;
+    let values = widget.options.values;
+
+    if (node.comfyClass === "LoadImageUnified") {
+        const search = node.widgets.find(w => w.name === "image_search")?.value;
+        const removed = new Set(detail.removed || []);
+        values = values.filter(v => !removed.has(v));
+        if (!search) values = [...(detail.added || []).filter(v => !values.includes(v)), ...values];
+    } else {
+        // LoadImageWithSubfolders 使用相对 input 的路径；LoadImageFromReload 只列出 input/reload 下的文件
+        const toLocal = (name) => {
+            if (!name.startsWith("input/")) return null;
+            const local = name.slice("input/".length);
+            if (node.comfyClass === "LoadImageFromReload") {
+                return local.startsWith("reload/") && !local.slice("reload/".length).includes("/") ? local : null;
+            }
+            return local;
+        };
+        const removed = new Set((detail.removed || []).map(toLocal).filter(Boolean));
+        const added = (detail.added || []).map(toLocal).filter(v => v && !values.includes(v));
+        values = [...values.filter(v => !removed.has(v)), ...added].sort();
+    }
+    widget.options.values = values;
+}
+
 app.registerExtension({
     name: "supernova.PreviewImage",
+    setup() {
+        api.addEventListener("supernova_files_changed", async ({ detail }) => {
+            const nodes = (app.graph?._nodes || []).filter(n =>
+                ["LoadImageUnified", "LoadImageWithSubfolders", "LoadImageFromReload"].includes(n.comfyClass));
+            if (!nodes.length) return;
+            if (detail.reset) {
+                // 变化太多时重新获取第一页
+                try {
+                    const res = await api.fetchApi("/mape/get_all_image_files?limit=1000");
+                    const data = await res.json();
+                    for (const n of nodes) {
+                        if (n.comfyClass !== "LoadImageUnified") continue;
+                        const w = n.widgets?.find(w => w.name === "image");
+                        if (w) w.options.values = data.files || [];
+                    }
+                } catch (e) {}
+                return;
+            }
+            for (const n of nodes) applyFileChanges(n, detail);
+            app.graph.setDirtyCanvas(true, true);
+        });
+    },
     async beforeRegisterNodeDef(nodeType, nodeData, app) {
         if (
             nodeData.name === "LoadImageUnified" || nodeData.name === "load_image_by_path"
@@ -125,12 +178,31 @@ app.registerExtension({
                                         subfolder = parts.slice(1, parts.length - 1).join('/');
                                     }
                                 }
-                                const params = new URLSearchParams({ filename, type, subfolder });
-                                const url = api.apiURL("/view?" + params.toString());
+                                const params = new URLSearchParams({ filename, type, subfolder, size: String(PREVIEW_THUMB_SIZE) });
+                                const url = api.apiURL("/supernova/thumb?" + params.toString());
                                 updatePreview(url);
                             }
                         };
                         setTimeout(() => { if(imageWidget.value) imageWidget.callback(imageWidget.value); }, 100);
+
+                        // 搜索框：下拉菜单只加载最新的一页，其余文件通过服务端分页/过滤查找 (不参与序列化)
+                        let searchTimer = null;
+                        const searchImages = async (text) => {
+                            const params = new URLSearchParams({ limit: "1000" });
+                            if (text) params.set("search", text);
+                            try {
+                                const res = await api.fetchApi("/mape/get_all_image_files?" + params.toString());
+                                if (!res.ok) return;
+                                const data = await res.json();
+                                imageWidget.options.values = data.files || [];
+                                node.graph?.setDirtyCanvas(true, true);
+                            } catch (e) {}
+                        };
+                        const searchWidget = this.addWidget("text", "image_search", "", (value) => {
+                            clearTimeout(searchTimer);
+                            searchTimer = setTimeout(() => searchImages(value), 250);
+                        }, { serialize: false });
+                        searchWidget.serialize = false;
                     }
                 }
 
@@ -142,17 +214,9 @@ app.registerExtension({
                         pathWidget.callback = async (value) => {
                             if (cb) cb.call(pathWidget, value);
                             if (value && value.length > 3) {
-                                try {
-                                    const params = new URLSearchParams({ path: value });
-                                    const res = await fetch(api.apiURL("/mape/preview_absolute_path?" + params.toString()));
-                                    if (res.ok) {
-                                        const data = await res.json();
-                                        if (data.filename) {
-                                            const url = api.apiURL(`/view?filename=${data.filename}&type=${data.type}`);
-                                            updatePreview(url);
-                                        }
-                                    }
-                                } catch (e) {}
+                                // 缩略图接口直接读取绝对路径 (目录取第一张图片)，无需先复制到 temp
+                                const params = new URLSearchParams({ path: value, size: String(PREVIEW_THUMB_SIZE) });
+                                updatePreview(api.apiURL("/supernova/thumb?" + params.toString()));
                             }
                         };
                     }
@@ -164,6 +164,8 @@ app.registerExtension({
                     const skipWidget = this.widgets.find(w => w.name === "skip_first_frames");
                     const nthWidget = this.widgets.find(w => w.name === "select_every_nth");
                     const capWidget = this.widgets.find(w => w.name === "frame_load_cap");
+                    const startWidget = this.widgets.find(w => w.name === "start_time");
+                    const endWidget = this.widgets.find(w => w.name === "end_time");
 
                     const requestContent = async () => {
                         const path = pathWidget?.value;
@@ -172,6 +174,8 @@ app.registerExtension({
                         const skip = skipWidget ? skipWidget.value : 0;
                         const nth = nthWidget ? nthWidget.value : 1;
                         const cap = capWidget ? capWidget.value : 0;
+                        const start = startWidget ? startWidget.value : 0;
+                        const end = endWidget ? endWidget.value : 0;
 
                         if (!path || typeof path !== "string" || path.length < 3) return;
 
@@ -182,7 +186,9 @@ app.registerExtension({
                                 index: index,
                                 skip: skip,
                                 nth: nth,
-                                cap: cap
+                                cap: cap,
+                                start: start,
+                                end: end
                             });
                             
                             // 调用统一接口
@@ -191,7 +197,8 @@ app.registerExtension({
                             if (res.ok) {
                                 const data = await res.json();
                                 if (data.filename) {
-                                    const url = api.apiURL(`/view?filename=${data.filename}&type=${data.type}`);
+                                    const viewParams = new URLSearchParams({ filename: data.filename, type: data.type, subfolder: data.subfolder || "" });
+                                    const url = api.apiURL("/view?" + viewParams.toString());
                                     // format="video" 为视频，否则为图片
                                     const isVideo = data.format === "video";
                                     node.updatePreviewFunc(url, isVideo);
@@ -202,8 +209,24 @@ app.registerExtension({
 
                     const debouncedRequest = debounce(requestContent, 300);
 
+                    // 路径变化时读取视频元数据 (只解析容器头)，限制帧序号控件的范围
+                    const probeVideo = async () => {
+                        const path = pathWidget?.value;
+                        if (!path || typeof path !== "string" || path.length < 3) return;
+                        try {
+                            const res = await fetch(api.apiURL("/simple_video/probe?" + new URLSearchParams({ path }).toString()));
+                            if (!res.ok) return;
+                            const info = await res.json();
+                            node.videoInfo = info;
+                            if (info.frame_count) {
+                                if (indexWidget) indexWidget.options.max = info.frame_count;
+                                if (skipWidget) skipWidget.options.max = Math.max(0, info.frame_count - 1);
+                            }
+                        } catch (e) {}
+                    };
+
                     // 绑定监听
-                    const widgetsToWatch = [pathWidget, indexWidget, skipWidget, nthWidget, capWidget];
+                    const widgetsToWatch = [pathWidget, indexWidget, skipWidget, nthWidget, capWidget, startWidget, endWidget];
                     
                     widgetsToWatch.forEach(w => {
                         if (w) {
@@ -211,14 +234,14 @@ app.registerExtension({
                             w.callback = function (value) {
                                 if (cb) cb.call(w, value);
                                 // 路径变化立即请求，其他参数变化使用防抖
-                                if (w.name === "video_path") requestContent();
+                                if (w.name === "video_path") { probeVideo(); requestContent(); }
                                 else debouncedRequest();
                             };
                         }
                     });
                     
                     // 初始化
-                    setTimeout(() => { if(pathWidget.value) requestContent(); }, 500);
+                    setTimeout(() => { if(pathWidget.value) { probeVideo(); requestContent(); } }, 500);
                 }
 
                 return r;
@@ -8,6 +8,7 @@ from aiohttp import web
 from server import PromptServer
 import nodes
 from nodes import PreviewImage
+from ..code.image_dtype import resolve_image_dtype, frame_to_uint8
 
 # ==============================================================================
 # 1. 全局配置与资源挂载
@@ -285,10 +286,11 @@ class ImageAddText:
             font_path = os.path.abspath(os.path.join(current_dir, "..", "Fonts", "local.ttf"))
 
         padding = int(font_size + 2)
+        dtype = resolve_image_dtype()
         img_batches = []
         
         for i in range(image.shape[0]):
-            img_np = (image[i].cpu().numpy() * 255).astype(np.uint8)
+            img_np = frame_to_uint8(image[i])
             pil_img = Image.fromarray(img_np)
             orig_w, orig_h = pil_img.size
             
@@ -404,7 +406,7 @@ class ImageAddText:
                 draw.text((int(base_txt_x + off_x), int(base_txt_y + off_y)), content, font=font, fill=txt_col, align="center", spacing=4)
 
             # 输出
-            img_batches.append(torch.from_numpy(np.array(res_img).astype(np.float32) / 255.0).unsqueeze(0))
+            img_batches.append(torch.from_numpy(np.array(res_img)).to(dtype).div_(255.0).unsqueeze(0))
 
         return (torch.cat(img_batches, dim=0),)
 
@@ -2,6 +2,7 @@ import torch
 import numpy as np
 import os
 from PIL import Image, ImageDraw, ImageFont, ImageColor
+from ..code.image_dtype import resolve_image_dtype, frame_to_uint8
 
 class ImageAddText:
     @classmethod
@@ -29,10 +30,11 @@ class ImageAddText:
             font_path = os.path.abspath(os.path.join(current_dir, "..", "Fonts", "local.ttf"))
 
         padding = int(font_size + 2)
+        dtype = resolve_image_dtype()
         img_batches = []
         
         for i in range(image.shape[0]):
-            img_np = (image[i].cpu().numpy() * 255).astype(np.uint8)
+            img_np = frame_to_uint8(image[i])
             pil_img = Image.fromarray(img_np)
             orig_w, orig_h = pil_img.size
             
@@ -148,7 +150,7 @@ class ImageAddText:
                 draw.text((int(base_txt_x + off_x), int(base_txt_y + off_y)), content, font=font, fill=txt_col, align="center", spacing=4)
 
             # 输出
-            img_batches.append(torch.from_numpy(np.array(res_img).astype(np.float32) / 255.0).unsqueeze(0))
+            img_batches.append(torch.from_numpy(np.array(res_img)).to(dtype).div_(255.0).unsqueeze(0))
 
         return (torch.cat(img_batches, dim=0),)
 
@@ -1,22 +1,37 @@
 # 导入os模块，用于处理文件和目录路径
 import os
-import shutil
+import re
+import math
+import asyncio
 import time
 import hashlib
+import threading
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from aiohttp import web
 
 # 导入Pillow库
-from PIL import Image, ImageOps, ImageSequence
+from PIL import Image, ImageOps
 from PIL.PngImagePlugin import PngInfo
 
 # 导入PyTorch
 import torch
+import torch.nn.functional as F
 
 # 导入ComfyUI核心模块
 import folder_paths
 from server import PromptServer
 
+from ..code.file_index import get_file_index
+from ..code.file_watcher import FileWatcher
+from ..code.supernova_config import get_setting
+from ..code.file_fingerprint import file_fingerprint
+from ..code.image_cache import get_image_cache
+from ..code.image_prefetch import QueuePrefetcher
+from ..code.image_dtype import IMAGE_DTYPES, resolve_image_dtype, to_image_dtype
+from ..code.preview_store import PreviewStore, get_preview_store
+from ..code.thumbnails import THUMB_FORMATS, get_thumbnail, source_size
+
 # ============================================================================
 # 全局常量
 # ============================================================================
@@ -29,34 +44,106 @@ IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.tiff', '
 # ============================================================================
 
 # API 1: 获取所有图片列表 (LoadImageUnified 用)
-@PromptServer.instance.routes.get("/mape/get_all_image_files")
-async def get_all_image_files(request):
-    search_locations = {
+# 结果来自持久化的增量文件索引，刷新时只重新扫描修改过的目录；扫描在线程池中执行，不阻塞事件循环。
+# 可选查询参数 (任一分页/过滤参数存在时返回 {"files", "total", "next_cursor"}，否则返回完整数组):
+#   root=output,input  prefix=子文件夹  search=子串或通配符  sort=-mtime|mtime|name|-name|size|-size
+#   limit=每页数量  cursor=上一页返回的 next_cursor  rescan=1 (强制完整扫描)
+# 响应带 ETag，列表未变化时对 If-None-Match 返回 304。
+IMAGE_LIST_PAGE_KEYS = {"prefix", "search", "sort", "limit", "cursor"}
+IMAGE_LIST_MAX_LIMIT = 10000
+
+def get_image_search_locations():
+    return {
         "output": folder_paths.get_output_directory(),
         "temp": folder_paths.get_temp_directory(),
         "input": folder_paths.get_input_directory(),
     }
-    exclude_folders = {}
-    
-    files_with_meta = []
-    for dir_type, base_path in search_locations.items():
-        if not os.path.isdir(base_path): continue
-        
-        for root, dirs, files in os.walk(base_path, followlinks=True):
-            dirs[:] = [d for d in dirs if d not in exclude_folders]
-            for file in files:
-                if os.path.splitext(file)[1].lower() in IMAGE_EXTENSIONS:
-                    full_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(full_path, start=base_path)
-                    annotated_filename = f"{dir_type}/{relative_path.replace('\\', '/')}"
-                    files_with_meta.append({
-                        'filename': annotated_filename,
-                        'mtime': os.path.getmtime(full_path)
-                    })
-    
-    files_with_meta.sort(key=lambda x: x['mtime'], reverse=True)
-    sorted_file_list = [item['filename'] for item in files_with_meta]
-    return web.json_response(sorted_file_list)
+
+def refresh_image_index(search_locations, full=False):
+    index = get_file_index()
+    for base_path in search_locations.values():
+        index.refresh(base_path, full=full)
+    return index
+
+@PromptServer.instance.routes.get("/mape/get_all_image_files")
+async def get_all_image_files(request):
+    query = request.rel_url.query
+    search_locations = get_image_search_locations()
+    prefix = query.get("prefix", "").replace("\\", "/").strip("/")
+
+    roots = [r.strip() for r in query.get("root", "").split(",") if r.strip()]
+    # prefix 也可以写成带根目录的形式，例如 output/2024
+    head, _, rest = prefix.partition("/")
+    if not roots and head in search_locations:
+        roots, prefix = [head], rest
+    if roots:
+        search_locations = {k: v for k, v in search_locations.items() if k in roots}
+
+    try:
+        limit = min(max(1, int(query["limit"])), IMAGE_LIST_MAX_LIMIT) if query.get("limit") else None
+        offset = max(0, int(query.get("cursor") or 0))
+    except ValueError:
+        return web.json_response({"error": "limit 和 cursor 必须是整数"}, status=400)
+
+    full = query.get("rescan", "") in ("1", "true", "full")
+    loop = asyncio.get_running_loop()
+    index = await loop.run_in_executor(None, refresh_image_index, search_locations, full)
+
+    etag = '"' + hashlib.md5(f"{index.token}:{index.version}:{request.rel_url.query_string}".encode()).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers=headers)
+
+    rows, total = await loop.run_in_executor(None, lambda: index.query(
+        search_locations, IMAGE_EXTENSIONS, prefix=prefix, search=query.get("search", "").strip(),
+        sort=query.get("sort", "-mtime"), limit=limit, offset=offset))
+    file_list = [f"{dir_type}/{relpath}" for dir_type, relpath, _, _ in rows]
+
+    if not IMAGE_LIST_PAGE_KEYS.intersection(query):
+        return web.json_response(file_list, headers=headers)
+    next_offset = offset + len(rows)
+    next_cursor = str(next_offset) if limit is not None and next_offset < total else None
+    return web.json_response({"files": file_list, "total": total, "next_cursor": next_cursor}, headers=headers)
+
+# 文件变化推送：任何一次索引刷新 (列表接口、节点输入列表或后台监听) 发现新增/删除的图片时，
+# 通过 "supernova_files_changed" 事件推送给前端。
+# config.json 中 "file_watcher": true 开启后台监听 (默认关闭)，"file_watch_interval" 为没有 watchdog 时的轮询间隔 (秒)。
+# 单次推送的最大条目数，超过时只通知前端整体刷新
+MAX_DELTA_ITEMS = 1000
+
+def push_file_changes(root_name, added, removed):
+    added = [f"{root_name}/{p}" for p in added if os.path.splitext(p)[1].lower() in IMAGE_EXTENSIONS]
+    removed = [f"{root_name}/{p}" for p in removed if os.path.splitext(p)[1].lower() in IMAGE_EXTENSIONS]
+    if not added and not removed: return
+    if len(added) + len(removed) > MAX_DELTA_ITEMS:
+        payload = {"reset": True}
+    else:
+        payload = {"added": added, "removed": removed}
+    PromptServer.instance.send_sync("supernova_files_changed", payload)
+
+def on_index_change(root, added, removed):
+    for name, path in get_image_search_locations().items():
+        if os.path.abspath(path) == root:
+            push_file_changes(name, added, removed)
+
+get_file_index().add_listener(on_index_change)
+
+FILE_WATCHER = None
+if get_setting("file_watcher", False):
+    FILE_WATCHER = FileWatcher(get_image_search_locations, float(get_setting("file_watch_interval", 1.0)))
+    FILE_WATCHER.start()
+
+# 供 /my-nodes/refresh-files 使用：从索引返回全部图片 (带 output/ 等前缀，最新的在前)
+def get_image_file_list():
+    search_locations = get_image_search_locations()
+    rows = refresh_image_index(search_locations).list_files(search_locations, IMAGE_EXTENSIONS)
+    return [f"{dir_type}/{relpath}" for dir_type, relpath, _, _ in rows]
+
+try:
+    from .. import API_FUNCTION_REGISTRY
+    API_FUNCTION_REGISTRY["get_image_file_list"] = get_image_file_list
+except ImportError:
+    pass
 
 # API 2: 绝对路径图片预览接口 (load_image_by_path 用)
 @PromptServer.instance.routes.get("/mape/preview_absolute_path")
@@ -78,24 +165,513 @@ async def preview_absolute_path(request):
 
     if not os.path.exists(path): return web.json_response({"error": "Not found"}, status=404)
 
-    # 创建临时预览文件
-    filename = os.path.basename(path)
-    file_hash = hashlib.md5(path.encode()).hexdigest()[:8]
-    temp_filename = f"preview_{file_hash}_{filename}"
-    
-    temp_dir = folder_paths.get_temp_directory()
-    temp_path = os.path.join(temp_dir, temp_filename)
+    # 链接进预览存储 (按源文件指纹寻址，源文件变化后生成新条目)
+    try:
+        name = get_preview_store().link(path)
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
+
+    info = PreviewStore.view_info(name, "image")
+    return web.json_response({"filename": info["filename"], "subfolder": info["subfolder"], "type": info["type"]})
+
+# API 3: 缩略图接口 (节点内预览用)
+# 支持 path=绝对路径 (目录取第一张图片)，或与 /view 相同的 filename/type/subfolder 参数 (filename 也可以带 output/ 等前缀)。
+# size 为最长边 (默认 512)，format 为 webp 或 jpeg。响应带 ETag 和原图尺寸 X-Image-Size。
+def resolve_preview_source(query):
+    path = query.get("path", "").strip().strip('"').strip("'")
+    if path:
+        if not os.path.exists(path) and path.startswith("temp/"):
+            path = os.path.join(folder_paths.get_temp_directory(), path.split("/")[-1])
+        if os.path.isdir(path):
+            images = list_directory_images(path)
+            return images[0] if images else None
+        return path
+
+    filename = query.get("filename", "").replace("\\", "/")
+    dir_type = query.get("type", "")
+    subfolder = query.get("subfolder", "")
+    if not dir_type:
+        head, _, rest = filename.partition("/")
+        dir_type, filename = (head, rest) if head in ("input", "output", "temp", "clipspace") and rest else ("input", filename)
+    if dir_type == "clipspace":
+        base = os.path.join(folder_paths.get_input_directory(), "clipspace")
+    else:
+        base = folder_paths.get_directory_by_type(dir_type)
+    if not base or not filename:
+        return None
+    base = os.path.abspath(base)
+    full_path = os.path.abspath(os.path.join(base, subfolder, filename))
+    if os.path.commonpath([base, full_path]) != base:
+        return None
+    return full_path
+
+@PromptServer.instance.routes.get("/supernova/thumb")
+async def get_thumbnail_image(request):
+    query = request.rel_url.query
+    source = resolve_preview_source(query)
+    if not source or not os.path.isfile(source):
+        return web.json_response({"error": "Not found"}, status=404)
+    try:
+        size = int(query.get("size", 512))
+    except ValueError:
+        return web.json_response({"error": "size 必须是整数"}, status=400)
+    fmt = query.get("format", "webp").lower()
+    if fmt not in THUMB_FORMATS: fmt = "webp"
+
+    loop = asyncio.get_running_loop()
+    try:
+        thumb_path, key = await loop.run_in_executor(None, get_thumbnail, source, size, fmt)
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
+
+    headers = {"ETag": f'"{key}"', "Cache-Control": "no-cache", "Content-Type": THUMB_FORMATS[fmt][1]}
+    dims = await loop.run_in_executor(None, source_size, source)
+    if dims: headers["X-Image-Size"] = f"{dims[0]}x{dims[1]}"
+    if request.headers.get("If-None-Match") == headers["ETag"]:
+        return web.Response(status=304, headers=headers)
+    return web.FileResponse(thumb_path, headers=headers)
+
+# API 4: 图片信息接口 (只读取文件头和帧头，不解码像素)
+# 参数与 /supernova/thumb 相同，返回 {width, height, frames, duration_ms, format}；duration_ms 为动图的总时长。
+def webp_duration(path):
+    """动画 WebP 的总时长：直接读取 RIFF 中各 ANMF 帧块的时长字段 (Pillow 只有解码帧后才提供时长)。"""
+    duration = 0
+    with open(path, "rb") as f:
+        if f.read(12)[8:12] != b"WEBP":
+            return 0
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                break
+            size = int.from_bytes(head[4:8], "little")
+            if head[:4] == b"ANMF":
+                payload = f.read(16)
+                duration += int.from_bytes(payload[12:15], "little")
+                f.seek(size - len(payload) + (size & 1), 1)
+            else:
+                f.seek(size + (size & 1), 1)
+    return duration
+
+def gif_duration(path):
+    """GIF 的总时长：累加每帧之前图形控制扩展 (GCE) 的延时字段，图像数据按子块跳过，不解码。"""
+    def skip_sub_blocks(f):
+        while True:
+            size = f.read(1)
+            if not size or size[0] == 0:
+                return
+            f.seek(size[0], 1)
+
+    duration = delay = 0
+    with open(path, "rb") as f:
+        head = f.read(13)
+        if len(head) < 13 or head[:3] != b"GIF":
+            return 0
+        if head[10] & 0x80:
+            f.seek(3 << ((head[10] & 0x07) + 1), 1)
+        while True:
+            intro = f.read(1)
+            if not intro or intro == b";":
+                break
+            if intro == b"!":
+                label = f.read(1)
+                if label == b"\xf9":
+                    block = f.read(6)
+                    if len(block) < 6:
+                        break
+                    delay = int.from_bytes(block[2:4], "little") * 10
+                    if block[5] != 0:
+                        skip_sub_blocks(f)
+                else:
+                    skip_sub_blocks(f)
+            elif intro == b",":
+                descriptor = f.read(9)
+                if len(descriptor) < 9:
+                    break
+                if descriptor[8] & 0x80:
+                    f.seek(3 << ((descriptor[8] & 0x07) + 1), 1)
+                f.seek(1, 1)  # LZW 最小码长
+                skip_sub_blocks(f)
+                # 与 Pillow 一致：没有 GCE 的帧时长为 0
+                duration, delay = duration + delay, 0
+            else:
+                break
+    return duration
+
+def apng_duration(path):
+    """APNG 的总时长：读取各 fcTL 块的 delay_num/delay_den，跳过其它块的数据。"""
+    duration = 0.0
+    with open(path, "rb") as f:
+        if f.read(8) != b"\x89PNG\r\n\x1a\n":
+            return 0
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                break
+            length, cid = int.from_bytes(head[:4], "big"), head[4:8]
+            if cid == b"fcTL" and length >= 26:
+                payload = f.read(26)
+                num, den = int.from_bytes(payload[20:22], "big"), int.from_bytes(payload[22:24], "big")
+                duration += num / (den or 100) * 1000
+                f.seek(length - 26 + 4, 1)
+            elif cid == b"IEND":
+                break
+            else:
+                f.seek(length + 4, 1)
+    return round(duration)
+
+def probe_image(path):
+    """只读取文件头和帧控制块，返回尺寸、帧数与动画总时长 (毫秒)，不解码任何帧。"""
+    with Image.open(path) as img:
+        w, h = oriented_size(img)
+        n_frames = getattr(img, "n_frames", 1)
+        duration = 0
+        # Pillow 只有 seek (会解码前一帧) 之后才给出各帧时长，这里直接解析帧控制块
+        if n_frames > 1 and img.format == "GIF":
+            duration = gif_duration(path)
+        elif n_frames > 1 and img.format == "PNG":
+            duration = apng_duration(path)
+        elif n_frames > 1 and img.format == "WEBP":
+            duration = webp_duration(path)
+        return {"width": w, "height": h, "frames": n_frames, "duration_ms": duration, "format": img.format}
+
+@PromptServer.instance.routes.get("/supernova/image_info")
+async def get_image_info(request):
+    source = resolve_preview_source(request.rel_url.query)
+    if not source or not os.path.isfile(source):
+        return web.json_response({"error": "Not found"}, status=404)
+    try:
+        info = await asyncio.get_running_loop().run_in_executor(None, probe_image, source)
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
+    return web.json_response(info)
 
-    if not os.path.exists(temp_path):
+# ============================================================================
+# 图像解码 (所有加载节点共用，结果进入进程级解码缓存)
+# ============================================================================
+
+# 降分辨率解码：max_side > 0 时，JPEG 用 draft() 在 DCT 阶段直接缩小，其它格式用 reduce() 整数倍缩小，
+# 最后再精确缩放到最长边 = max_side (比原图小时不放大)。
+MAX_SIDE_INPUT = ("INT", {"default": 0, "min": 0, "max": 16384, "step": 8, "tooltip": "0 = 原始尺寸；>0 时以接近目标的分辨率解码，再缩放到最长边"})
+
+def oriented_size(img):
+    """按 EXIF 方向修正后的 (宽, 高)，只读取文件头。"""
+    w, h = img.size
+    try:
+        orientation = img.getexif().get(0x0112, 1)
+    except Exception:
+        orientation = 1
+    return (h, w) if orientation in (5, 6, 7, 8) else (w, h)
+
+def target_size(w, h, max_side):
+    """最长边缩放到 max_side 后的尺寸；max_side 为 0 或图片不大于它时返回原尺寸。"""
+    if not max_side or max(w, h) <= max_side:
+        return (w, h)
+    scale = max_side / max(w, h)
+    return (max(1, round(w * scale)), max(1, round(h * scale)))
+
+def open_image(image_path, max_side=0):
+    """打开图片，返回 (PIL 图像, 目标尺寸)；不需要缩小时目标尺寸为 None。"""
+    img = Image.open(image_path)
+    if not max_side:
+        return img, None
+    w, h = oriented_size(img)
+    size = target_size(w, h, max_side)
+    if size == (w, h):
+        return img, None
+    if img.format == "JPEG":
+        raw_w, raw_h = img.size
+        scale = max_side / max(raw_w, raw_h)
+        img.draft(img.mode, (math.ceil(raw_w * scale), math.ceil(raw_h * scale)))
+    return img, size
+
+def resize_frame(i, size):
+    """缩放到目标尺寸 (在 EXIF 旋转之后调用)：先 reduce() 整数倍缩小，再用 LANCZOS 精确缩放。
+
+    调色板图片无论是否缩放都先转换，带透明色时转为 RGBA，两种情况下得到相同的遮罩。
+    """
+    if i.mode == "P":
+        i = i.convert("RGBA" if "transparency" in i.info else "RGB")
+    if size is None or i.size == size:
+        return i
+    factor = min(i.width // size[0], i.height // size[1])
+    if factor >= 2 and i.mode in ("L", "LA", "RGB", "RGBA"):
+        i = i.reduce(factor)
+    return i.resize(size, Image.LANCZOS)
+
+def decode_single_image(image_path, full_size_empty_mask=False, max_side=0):
+    """解码单张图片，返回 (image [1,H,W,3], mask [1,h,w])。没有 Alpha 通道时 mask 为全零。"""
+    i, size = open_image(image_path, max_side)
+    i = ImageOps.exif_transpose(i)
+    i = resize_frame(i, size)
+    image = i.convert("RGB")
+    image = np.array(image).astype(np.float32) / 255.0
+    image = torch.from_numpy(image)[None,]
+
+    if 'A' in i.getbands():
+        mask = np.array(i.getchannel('A')).astype(np.float32) / 255.0
+        mask = 1. - torch.from_numpy(mask)
+    elif full_size_empty_mask:
+        mask = torch.zeros((image.shape[1], image.shape[2]), dtype=torch.float32, device="cpu")
+    else:
+        mask = torch.zeros((64, 64), dtype=torch.float32, device="cpu")
+    return (image, mask.unsqueeze(0))
+
+def load_single_image(image_path, full_size_empty_mask=False, max_side=0):
+    """带缓存的 decode_single_image：文件未变化时直接返回已解码的张量 (只读共享)。"""
+    return get_image_cache().get_or_load(image_path, ("single", full_size_empty_mask, max_side),
+                                         lambda: decode_single_image(image_path, full_size_empty_mask, max_side))
+
+def prepare_frame(i, size=None):
+    """EXIF 方向、缩放与模式转换，返回 (RGB 图像, Alpha 数组或 None)。"""
+    i = ImageOps.exif_transpose(i)
+    if i.mode == 'I':
+        i = i.point(lambda i: i * (1 / 255))
+    i = resize_frame(i, size)
+    alpha = None
+    if 'A' in i.getbands():
+        alpha = np.array(i.getchannel('A'))
+    elif i.mode == 'P' and 'transparency' in i.info:
         try:
-            os.link(path, temp_path)
+            alpha = np.array(i.convert('RGBA').getchannel('A'))
         except:
+            alpha = None
+    return i.convert("RGB"), alpha
+
+# 多帧图片的帧选择 (起始帧, 帧数, 步长)，帧数 0 表示到最后一帧
+ALL_FRAMES = (0, 0, 1)
+
+def frame_indices(n_frames, frame_range=ALL_FRAMES):
+    """帧选择对应的帧下标 (range)。"""
+    start, count, stride = frame_range
+    stride = max(1, stride)
+    end = n_frames if count <= 0 else min(n_frames, start + count * stride)
+    return range(start, end, stride)
+
+def iter_frames(img, indices):
+    """直接 seek 到选中的帧，范围之后的帧不会被读取。"""
+    for k in indices:
+        try:
+            img.seek(k)
+        except EOFError:
+            break
+        yield img
+
+def decode_image_frames(image_path, max_side=0, frame_range=ALL_FRAMES):
+    """解码图片的选中帧 (GIF/APNG/多页 TIFF)，返回 ((image [1,H,W,3], mask [1,h,w]), ...)。"""
+    img, size = open_image(image_path, max_side)
+    if img.format == 'MPO': return ()
+
+    frames = []
+    for i in iter_frames(img, frame_indices(getattr(img, "n_frames", 1), frame_range)):
+        rgb, alpha = prepare_frame(i, size)
+        image = np.array(rgb).astype(np.float32) / 255.0
+        image = torch.from_numpy(image)[None,]
+
+        # Mask 处理
+        if alpha is not None:
+            mask = 1. - torch.from_numpy(alpha.astype(np.float32) / 255.0)
+        else:
+            mask = torch.zeros((64, 64), dtype=torch.float32, device="cpu")
+
+        frames.append((image, mask.unsqueeze(0)))
+    return tuple(frames)
+
+def load_image_frames(image_path, max_side=0, frame_range=ALL_FRAMES):
+    """带缓存的 decode_image_frames。"""
+    return get_image_cache().get_or_load(image_path, ("frames", max_side, tuple(frame_range)),
+                                         lambda: decode_image_frames(image_path, max_side, frame_range))
+
+# 目录模式的并行解码线程数
+DIRECTORY_DECODE_WORKERS = min(8, os.cpu_count() or 4)
+
+def read_image_header(image_path):
+    """只读取文件头，返回 (宽, 高, 帧数)；宽高已按 EXIF 方向修正，MPO 返回 0 帧。"""
+    with Image.open(image_path) as img:
+        if img.format == 'MPO': return (0, 0, 0)
+        w, h = oriented_size(img)
+        return (w, h, getattr(img, "n_frames", 1))
+
+DIRECTORY_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".gif", ".webp")
+DIRECTORY_SORT_MODES = ["name", "natural", "mtime"]
+
+def natural_sort_key(name):
+    """自然排序：frame2.png 排在 frame10.png 之前。"""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+def list_directory_images(directory, sort_mode="name"):
+    """按确定的顺序列出目录中的图片路径 (只读目录项，不打开文件)。"""
+    names = [f for f in os.listdir(directory) if f.lower().endswith(DIRECTORY_IMAGE_EXTENSIONS)]
+    if sort_mode == "natural":
+        names.sort(key=natural_sort_key)
+    elif sort_mode == "mtime":
+        names.sort(key=lambda f: (os.path.getmtime(os.path.join(directory, f)), f))
+    else:
+        names.sort()
+    return [os.path.join(directory, f) for f in names]
+
+# 目录中图片尺寸不一致时的处理方式
+SIZE_POLICIES = ["drop", "resize to first", "pad to max", "crop to min", "fit to WxH"]
+# 尺寸归一化时每次送入 interpolate 的帧数，限制临时张量的大小
+NORMALIZE_CHUNK = 64
+
+def output_size(sizes, size_policy, fit_size):
+    """按 size_policy 从各文件的 (宽, 高) 得到输出尺寸。"""
+    if size_policy == "pad to max":
+        return (max(w for w, _ in sizes), max(h for _, h in sizes))
+    if size_policy == "crop to min":
+        return (min(w for w, _ in sizes), min(h for _, h in sizes))
+    if size_policy == "fit to WxH":
+        return fit_size
+    return sizes[0]
+
+def pad_center(x, height, width):
+    h, w = x.shape[-2:]
+    top, left = (height - h) // 2, (width - w) // 2
+    return F.pad(x, (left, width - w - left, top, height - h - top))
+
+def normalize_frames(rgb, alpha, size, size_policy):
+    """把一组同尺寸的 uint8 帧 (rgb [n,h,w,3], alpha [n,h,w]) 一次性缩放/填充/裁剪到 size。
+
+    返回 float32 (image [n,H,W,3], mask [n,H,W])；填充区域视为透明 (mask = 1)。
+    """
+    width, height = size
+    x = torch.cat([rgb, alpha.unsqueeze(-1)], dim=-1).permute(0, 3, 1, 2).float()
+    h, w = x.shape[-2:]
+    if size_policy == "resize to first":
+        x = F.interpolate(x, size=(height, width), mode="bilinear", align_corners=False, antialias=True)
+    elif size_policy == "fit to WxH":
+        scale = min(width / w, height / h)
+        fit = (min(height, max(1, round(h * scale))), min(width, max(1, round(w * scale))))
+        x = pad_center(F.interpolate(x, size=fit, mode="bilinear", align_corners=False, antialias=True), height, width)
+    elif size_policy == "pad to max":
+        x = pad_center(x, height, width)
+    elif size_policy == "crop to min":
+        top, left = (h - height) // 2, (w - width) // 2
+        x = x[:, :, top:top + height, left:left + width]
+    x = x.clamp_(0, 255).div_(255.0)
+    return x[:, :3].permute(0, 2, 3, 1), 1.0 - x[:, 3]
+
+def load_image_directory(paths, max_side=0, frame_range=ALL_FRAMES, size_policy="drop", fit_size=(512, 512), dtype=torch.float32):
+    """在线程池中解码一组图片，直接写入预分配的 [N,H,W,3] 图像张量。
+
+    输出尺寸由 size_policy 决定 (max_side > 0 时基于缩放后的尺寸)：drop 取第一个可读文件的尺寸并跳过尺寸不同的
+    文件/帧；其它策略把尺寸不同的帧以 uint8 解码到按尺寸分组的暂存区，再按组批量缩放/填充/裁剪。
+    多帧文件只解码 frame_range 选中的帧；图像张量按 dtype 分配。没有可用帧时返回 None。
+    遮罩只在有帧带 Alpha 或存在填充区域时才分配完整的 [N,H,W]，否则与其它加载方式一样为 [N,64,64] 的全零遮罩。
+    """
+    def safe_header(path):
+        try:
+            return read_image_header(path)
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(DIRECTORY_DECODE_WORKERS) as pool:
+        headers = list(pool.map(safe_header, paths))
+
+        sizes = [target_size(hd[0], hd[1], max_side) if hd and hd[2] > 0 else None for hd in headers]
+        known = [sz for sz in sizes if sz]
+        if not known:
+            return None
+        w, h = output_size(known, size_policy, fit_size)
+        # job: (路径, 输出起始位置, 帧下标, 尺寸, 暂存区起始行)
+        jobs, group_rows, total = [], {}, 0
+        for path, hd, sz in zip(paths, headers, sizes):
+            if sz is None or (size_policy == "drop" and sz != (w, h)):
+                continue
+            indices = frame_indices(hd[2], frame_range)
+            if not len(indices):
+                continue
+            row = 0
+            if sz != (w, h):
+                row = group_rows.get(sz, 0)
+                group_rows[sz] = row + len(indices)
+            jobs.append((path, total, indices, sz, row))
+            total += len(indices)
+
+        images = torch.empty((total, h, w, 3), dtype=dtype)
+        valid = torch.zeros(total, dtype=torch.bool)
+        # 尺寸不同的帧: 每个尺寸一组 (输出位置, RGB)；Alpha 暂存区在该组第一次出现 Alpha 时才分配 (默认不透明)
+        staging = {sz: (torch.empty(n, dtype=torch.long),
+                        torch.empty((n, sz[1], sz[0], 3), dtype=torch.uint8))
+                   for sz, n in group_rows.items()}
+        # 完整尺寸的遮罩与 Alpha 暂存区按需分配
+        lazy, lazy_lock = {}, threading.Lock()
+
+        def full_masks():
+            with lazy_lock:
+                if "masks" not in lazy:
+                    lazy["masks"] = torch.zeros((total, h, w), dtype=torch.float32)
+                return lazy["masks"]
+
+        def stage_alpha(sz):
+            with lazy_lock:
+                if sz not in lazy:
+                    n = staging[sz][0].shape[0]
+                    lazy[sz] = torch.full((n, sz[1], sz[0]), 255, dtype=torch.uint8)
+                return lazy[sz]
+
+        for _, start, indices, sz, row in jobs:
+            if sz in staging:
+                staging[sz][0][row:row + len(indices)] = torch.arange(start, start + len(indices))
+        cache = get_image_cache()
+
+        def decode_into(job):
+            path, start, indices, sz, row = job
+            stage = staging.get(sz)
             try:
-                shutil.copy(path, temp_path)
+                if cache.contains(path, ("frames", max_side, tuple(frame_range))):
+                    for k, (image, mask) in enumerate(load_image_frames(path, max_side, frame_range)[:len(indices)]):
+                        if (image.shape[2], image.shape[1]) != sz: continue
+                        has_mask = mask.shape[1:] == image.shape[1:3]
+                        if stage is None:
+                            images[start + k] = image[0]
+                            if has_mask: full_masks()[start + k] = mask[0]
+                        else:
+                            stage[1][row + k] = image[0].mul(255.0).round_().to(torch.uint8)
+                            if has_mask: stage_alpha(sz)[row + k] = mask[0].neg().add_(1.0).mul_(255.0).round_().to(torch.uint8)
+                        valid[start + k] = True
+                    return
+                img, size = open_image(path, max_side)
+                with img:
+                    for k, frame in enumerate(iter_frames(img, indices)):
+                        rgb, alpha = prepare_frame(frame, size)
+                        if rgb.size != sz: continue
+                        if stage is None:
+                            images[start + k].copy_(torch.from_numpy(np.array(rgb))).div_(255.0)
+                            if alpha is not None:
+                                full_masks()[start + k].copy_(torch.from_numpy(alpha)).div_(-255.0).add_(1.0)
+                        else:
+                            stage[1][row + k].copy_(torch.from_numpy(np.array(rgb)))
+                            if alpha is not None: stage_alpha(sz)[row + k].copy_(torch.from_numpy(alpha))
+                        valid[start + k] = True
             except Exception as e:
-                return web.json_response({"error": str(e)}, status=500)
-
-    return web.json_response({"filename": temp_filename, "type": "temp"})
+                print(f"Failed to load: {path}, {e}")
+
+        list(pool.map(decode_into, jobs))
+
+    # 按尺寸分组批量归一化；解码失败的行对应的位置随后会被 valid 过滤。
+    # 填充出的区域视为透明，因此有填充时即使没有 Alpha 也需要完整的遮罩
+    pads = size_policy in ("pad to max", "fit to WxH")
+    for sz, (slots, rgb) in staging.items():
+        alpha = lazy.get(sz)
+        for c in range(0, slots.shape[0], NORMALIZE_CHUNK):
+            chunk = rgb[c:c + NORMALIZE_CHUNK]
+            chunk_alpha = alpha[c:c + NORMALIZE_CHUNK] if alpha is not None else torch.full(chunk.shape[:3], 255, dtype=torch.uint8)
+            image, mask = normalize_frames(chunk, chunk_alpha, (w, h), size_policy)
+            # 高级索引赋值要求 dtype 一致：归一化结果为 float32，图像张量可能是 float16
+            images[slots[c:c + NORMALIZE_CHUNK]] = image.to(images.dtype)
+            if alpha is not None or pads:
+                full_masks()[slots[c:c + NORMALIZE_CHUNK]] = mask
+
+    masks = lazy.get("masks")
+    if not bool(valid.all()):
+        images = images[valid]
+        if masks is not None: masks = masks[valid]
+    if images.shape[0] == 0:
+        return None
+    if masks is None:
+        masks = torch.zeros((images.shape[0], 64, 64), dtype=torch.float32)
+    return images, masks
 
 # ============================================================================
 # 节点 1: LoadImageFromReload (reload文件夹内图片读取器)
@@ -131,38 +707,25 @@ class LoadImageFromReload:
                     {"image": (sorted(file_list),
                                {"image_upload": True,}
                                )},
+                "optional": {"max_side": MAX_SIDE_INPUT},
                 }
     
     CATEGORY = "🪐supernova/ImageLoader"
     RETURN_TYPES = ("IMAGE", "MASK")
     FUNCTION = "load_image"
 
-    def load_image(self, image):
+    def load_image(self, image, max_side=0):
         image_path = folder_paths.get_annotated_filepath(image)
-        i = Image.open(image_path)
-        i = ImageOps.exif_transpose(i)
-        image = i.convert("RGB")
-        image = np.array(image).astype(np.float32) / 255.0
-        image = torch.from_numpy(image)[None,]
-        
-        if 'A' in i.getbands():
-            mask = np.array(i.getchannel('A')).astype(np.float32) / 255.0
-            mask = 1. - torch.from_numpy(mask)
-        else:
-            mask = torch.zeros((64,64), dtype=torch.float32, device="cpu")
-        
-        return (image, mask.unsqueeze(0))
+        image, mask = load_single_image(image_path, max_side=max_side)
+        return (to_image_dtype(image), mask)
 
     @classmethod
-    def IS_CHANGED(s, image):
+    def IS_CHANGED(s, image, max_side=0):
         image_path = folder_paths.get_annotated_filepath(image)
-        m = hashlib.sha256()
-        with open(image_path, 'rb') as f:
-            m.update(f.read())
-        return m.digest().hex()
+        return file_fingerprint(image_path)
 
     @classmethod
-    def VALIDATE_INPUTS(s, image):
+    def VALIDATE_INPUTS(s, image, max_side=0):
         if not folder_paths.exists_annotated_filepath(image):
             return "Invalid image file: {}".format(image)
         return True
@@ -175,21 +738,10 @@ class LoadImageWithSubfolders:
 
     @classmethod
     def INPUT_TYPES(s):
-        input_dir = folder_paths.get_input_directory()
-        file_list = []
-
-        for dirpath, dirnames, filenames in os.walk(input_dir, followlinks=True):
-            for filename in filenames:
-                if any(filename.lower().endswith(ext) for ext in s.SUPPORTED_EXTENSIONS):
-                    relative_subdir = os.path.relpath(dirpath, input_dir)
-                    
-                    if relative_subdir == ".":
-                        file_path = filename
-                    else:
-                        file_path = os.path.join(relative_subdir, filename)
-                    
-                    file_path = file_path.replace("\\", "/")
-                    file_list.append(file_path)
+        # 从文件索引读取 (只重新扫描修改过的目录)，不再每次完整遍历 input
+        input_location = {"input": folder_paths.get_input_directory()}
+        rows = refresh_image_index(input_location).list_files(input_location, set(s.SUPPORTED_EXTENSIONS))
+        file_list = [relpath for _, relpath, _, _ in rows]
         
         if not file_list:
             file_list.append("No images found in input folder or its subfolders")
@@ -197,39 +749,26 @@ class LoadImageWithSubfolders:
         return {
             "required": {
                 "image": (sorted(file_list), {"image_upload": True})
-            }
+            },
+            "optional": {"max_side": MAX_SIDE_INPUT},
         }
 
     CATEGORY = "🪐supernova/ImageLoader"
     RETURN_TYPES = ("IMAGE", "MASK")
     FUNCTION = "load_image"
 
-    def load_image(self, image):
+    def load_image(self, image, max_side=0):
         image_path = folder_paths.get_annotated_filepath(image)
-        i = Image.open(image_path)
-        i = ImageOps.exif_transpose(i)
-        image = i.convert("RGB")
-        image = np.array(image).astype(np.float32) / 255.0
-        image = torch.from_numpy(image)[None,]
-
-        if 'A' in i.getbands():
-            mask = np.array(i.getchannel('A')).astype(np.float32) / 255.0
-            mask = 1. - torch.from_numpy(mask)
-        else:
-            mask = torch.zeros((64, 64), dtype=torch.float32, device="cpu")
-
-        return (image, mask.unsqueeze(0))
+        image, mask = load_single_image(image_path, max_side=max_side)
+        return (to_image_dtype(image), mask)
 
     @classmethod
-    def IS_CHANGED(s, image):
+    def IS_CHANGED(s, image, max_side=0):
         image_path = folder_paths.get_annotated_filepath(image)
-        m = hashlib.sha256()
-        with open(image_path, 'rb') as f:
-            m.update(f.read())
-        return m.digest().hex()
+        return file_fingerprint(image_path)
 
     @classmethod
-    def VALIDATE_INPUTS(s, image):
+    def VALIDATE_INPUTS(s, image, max_side=0):
         if not folder_paths.exists_annotated_filepath(image):
             return "Invalid image file: {}".format(image)
         return True
@@ -246,11 +785,15 @@ class LoadImageUnified:
                     "image_upload": True, 
                     "remote": {
                         "route": "/mape/get_all_image_files",
+                        # 只取最新的一页，更早的文件通过节点上的搜索框查找
+                        "query_params": {"limit": "1000"},
+                        "response_key": "files",
                         "refresh_button": True, 
                         "control_after_refresh": "first", 
                     },
                 }),
-            }
+            },
+            "optional": {"max_side": MAX_SIDE_INPUT},
         }
 
     CATEGORY = "🪐supernova/ImageLoader"
@@ -279,37 +822,24 @@ class LoadImageUnified:
         
         return os.path.join(base_path, subpath)
 
-    def load_image(self, image):
+    def load_image(self, image, max_side=0):
         image_path = self.get_full_path(image)
         
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"文件未找到: {image_path}")
 
-        i = Image.open(image_path)
-        i = ImageOps.exif_transpose(i)
-        image_tensor = i.convert("RGB")
-        image_tensor = np.array(image_tensor).astype(np.float32) / 255.0
-        image_tensor = torch.from_numpy(image_tensor)[None,]
-        
-        if 'A' in i.getbands():
-            mask = np.array(i.getchannel('A')).astype(np.float32) / 255.0
-            mask = 1.0 - torch.from_numpy(mask)
-        else:
-            mask = torch.zeros((image_tensor.shape[1], image_tensor.shape[2]), dtype=torch.float32, device="cpu")
-            
-        return (image_tensor, mask.unsqueeze(0))
+        image, mask = load_single_image(image_path, full_size_empty_mask=True, max_side=max_side)
+        return (to_image_dtype(image), mask)
 
     @classmethod
-    def IS_CHANGED(cls, image):
+    def IS_CHANGED(cls, image, max_side=0):
         instance = cls()
         image_path = instance.get_full_path(image)
         if not os.path.exists(image_path): return time.time() 
-        m = hashlib.sha256()
-        with open(image_path, 'rb') as f: m.update(f.read())
-        return m.digest().hex()
+        return file_fingerprint(image_path)
     
     @classmethod
-    def VALIDATE_INPUTS(cls, image):
+    def VALIDATE_INPUTS(cls, image, max_side=0):
         # 强制返回 True，允许加载不在列表中的路径（尤其是临时文件）
         return True
 
@@ -323,14 +853,32 @@ class load_image_by_path:
             "required": {
                 "img_path": ("STRING", {"default": "", "multiline": False}),
             },
+            # 目录模式的分页选项：先排序、再按窗口挑选文件，窗口外的文件不会被打开
+            "optional": {
+                "start_index": ("INT", {"default": 0, "min": 0, "max": 0xffffffff, "step": 1}),
+                "max_count": ("INT", {"default": 0, "min": 0, "max": 0xffffffff, "step": 1, "tooltip": "0 = 不限制"}),
+                "every_nth": ("INT", {"default": 1, "min": 1, "max": 10000, "step": 1}),
+                "sort_mode": (DIRECTORY_SORT_MODES,),
+                "max_side": MAX_SIDE_INPUT,
+                # 多帧文件 (GIF/APNG/WebP/TIFF) 的帧选择：直接 seek，范围外的帧不解码
+                "frame_start": ("INT", {"default": 0, "min": 0, "max": 0xffffffff, "step": 1}),
+                "frame_count": ("INT", {"default": 0, "min": 0, "max": 0xffffffff, "step": 1, "tooltip": "0 = 到最后一帧"}),
+                "frame_stride": ("INT", {"default": 1, "min": 1, "max": 10000, "step": 1}),
+                # 目录中图片尺寸不一致时的处理方式 (fit to WxH 使用 fit_width/fit_height，等比缩放后居中填充)
+                "size_policy": (SIZE_POLICIES,),
+                "fit_width": ("INT", {"default": 512, "min": 1, "max": 16384, "step": 8}),
+                "fit_height": ("INT", {"default": 512, "min": 1, "max": 16384, "step": 8}),
+                "image_dtype": (IMAGE_DTYPES, {"tooltip": "输出图像的精度，default 使用 config.json 中的 image_dtype；float16 内存减半"}),
+            },
         }
 
-    RETURN_TYPES = ("IMAGE", "MASK")
-    RETURN_NAMES = ("image", "mask")
+    RETURN_TYPES = ("IMAGE", "MASK", "INT", "INT")
+    RETURN_NAMES = ("image", "mask", "total_count", "next_index")
     FUNCTION = "load_all"
     CATEGORY = "🪐supernova/ImageLoader"
 
-    def load_all(self, img_path):
+    @staticmethod
+    def resolve_path(img_path):
         # 1. 基础清理
         if img_path is None: img_path = ""
         if not isinstance(img_path, str): img_path = str(img_path)
@@ -349,74 +897,104 @@ class load_image_by_path:
                 # 如果文件存在，就使用这个绝对路径
                 if os.path.exists(temp_path):
                     img_path = temp_path
+        return img_path
+
+    def load_all(self, img_path, start_index=0, max_count=0, every_nth=1, sort_mode="name", max_side=0,
+                 frame_start=0, frame_count=0, frame_stride=1, size_policy="drop", fit_width=512, fit_height=512,
+                 image_dtype="default"):
+        # 1-2. 路径清理与解析 (支持 temp/ 前缀)
+        img_path = self.resolve_path(img_path)
 
         # 3. 初始化输出
         output_images = []
         output_masks = []
         w, h = None, None
 
-        # 4. 图像处理内部函数
-        def process_pil_image(img):
+        # 4. 收集帧 (解码结果来自缓存)，尺寸与第一帧不同的帧被跳过
+        def add_frames(frames):
             nonlocal w, h
-            if img.format == 'MPO': return 
-
-            for i in ImageSequence.Iterator(img):
-                i = ImageOps.exif_transpose(i)
-                if i.mode == 'I':
-                    i = i.point(lambda i: i * (1 / 255))
-                image = i.convert("RGB")
-
-                if len(output_images) == 0:
-                    w = image.size[0]
-                    h = image.size[1]
-                
-                if image.size[0] != w or image.size[1] != h:
+            for image, mask in frames:
+                if w is None:
+                    h, w = image.shape[1], image.shape[2]
+                if image.shape[1] != h or image.shape[2] != w:
                     continue
-
-                image = np.array(image).astype(np.float32) / 255.0
-                image = torch.from_numpy(image)[None,]
-
-                # Mask 处理
-                if 'A' in i.getbands():
-                    mask = np.array(i.getchannel('A')).astype(np.float32) / 255.0
-                    mask = 1. - torch.from_numpy(mask)
-                elif i.mode == 'P' and 'transparency' in i.info:
-                    try:
-                        mask = np.array(i.convert('RGBA').getchannel('A')).astype(np.float32) / 255.0
-                        mask = 1. - torch.from_numpy(mask)
-                    except:
-                        mask = torch.zeros((64, 64), dtype=torch.float32, device="cpu")
-                else:
-                    mask = torch.zeros((64, 64), dtype=torch.float32, device="cpu")
-
                 output_images.append(image)
-                output_masks.append(mask.unsqueeze(0))
+                output_masks.append(mask)
 
         # 5. 执行加载
+        frame_range = (frame_start, frame_count, frame_stride)
+        dtype = resolve_image_dtype(image_dtype)
+        total_count, next_index = 0, 0
         if img_path and os.path.exists(img_path):
             if os.path.isdir(img_path):
-                for filename in sorted(os.listdir(img_path)):
-                    if filename.lower().endswith((".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".gif", ".webp")):
-                        try:
-                            full_path = os.path.join(img_path, filename)
-                            img = Image.open(full_path)
-                            process_pil_image(img)
-                        except: pass
+                paths = list_directory_images(img_path, sort_mode)
+                total_count = len(paths)
+                selected = paths[start_index::every_nth]
+                if max_count > 0: selected = selected[:max_count]
+                next_index = min(start_index + len(selected) * every_nth, total_count)
+                result = load_image_directory(selected, max_side, frame_range, size_policy, (fit_width, fit_height), dtype) if selected else None
+                if result is not None:
+                    return result + (total_count, next_index)
             else:
                 try:
-                    img = Image.open(img_path)
-                    process_pil_image(img)
+                    add_frames(load_image_frames(img_path, max_side, frame_range))
+                    total_count, next_index = 1, 1
                 except Exception as e:
                     print(f"Failed to load: {img_path}, {e}")
 
         # 6. 返回结果
         if not output_images:
-            return (torch.zeros((1, 64, 64, 3), dtype=torch.float32), torch.zeros((1, 64, 64), dtype=torch.float32))
+            return (torch.zeros((1, 64, 64, 3), dtype=dtype), torch.zeros((1, 64, 64), dtype=torch.float32), total_count, next_index)
 
         if len(output_images) > 1:
-            return (torch.cat(output_images, dim=0), torch.cat(output_masks, dim=0))
+            return (torch.cat(output_images, dim=0).to(dtype), torch.cat(output_masks, dim=0), total_count, next_index)
         else:
-            return (output_images[0], output_masks[0])
+            return (output_images[0].to(dtype), output_masks[0], total_count, next_index)
+
+# ============================================================================
+# 队列预取：config.json 中 "image_prefetch": true 开启，"prefetch_count" 为提前解码的图片数，
+# "prefetch_mb" 为预取的内存预算 (不超过解码缓存的一半)
+# ============================================================================
+def plan_prefetch(prompt):
+    """列出一个任务中各加载节点将要解码的图片: (路径, 缓存参数, 解码函数)。
+
+    参数来自连线 (而不是控件值) 的节点无法提前确定，直接跳过；目录模式不预取。
+    """
+    for node in prompt.values():
+        class_type, inputs = node.get("class_type"), node.get("inputs", {})
+        max_side = inputs.get("max_side", 0)
+        if not isinstance(max_side, int):
+            continue
+        try:
+            if class_type in ("LoadImageFromReload", "LoadImageWithSubfolders", "LoadImageUnified"):
+                image = inputs.get("image")
+                if not isinstance(image, str):
+                    continue
+                full_size_empty_mask = class_type == "LoadImageUnified"
+                if full_size_empty_mask:
+                    path = LoadImageUnified().get_full_path(image)
+                else:
+                    path = folder_paths.get_annotated_filepath(image)
+                if os.path.isfile(path):
+                    yield (path, ("single", full_size_empty_mask, max_side),
+                           lambda p=path, f=full_size_empty_mask, m=max_side: decode_single_image(p, f, m))
+            elif class_type == "load_image_by_path":
+                img_path = inputs.get("img_path")
+                frame_range = tuple(inputs.get(k, d) for k, d in zip(("frame_start", "frame_count", "frame_stride"), ALL_FRAMES))
+                if not isinstance(img_path, str) or not all(isinstance(v, int) for v in frame_range):
+                    continue
+                path = load_image_by_path.resolve_path(img_path)
+                if os.path.isfile(path):
+                    yield (path, ("frames", max_side, frame_range),
+                           lambda p=path, m=max_side, r=frame_range: decode_image_frames(p, m, r))
+        except Exception:
+            continue
+
+IMAGE_PREFETCHER = None
+if get_setting("image_prefetch", False):
+    IMAGE_PREFETCHER = QueuePrefetcher(plan_prefetch, int(get_setting("prefetch_count", 8)),
+                                       int(get_setting("prefetch_mb", 512)) * 1024 * 1024)
+    IMAGE_PREFETCHER.start()
 
 # ============================================================================
 # 节点映射注册
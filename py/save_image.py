@@ -10,6 +10,7 @@ from PIL.PngImagePlugin import PngInfo
 import folder_paths
 from nodes import SaveImage
 from server import PromptServer
+from ..code.image_dtype import frame_to_uint8
 
 # ============================================================================
 # 公共辅助函数：处理日期占位符
@@ -81,8 +82,7 @@ class SaveImageToInput:
         
         preview_results = list()
         for image in images:
-            i = 255. * image.cpu().numpy()
-            img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
+            img = Image.fromarray(frame_to_uint8(image))
             
             metadata = PngInfo()
             if prompt is not None:
@@ -1,4 +1,5 @@
 import os
+import asyncio
 import folder_paths
 import numpy as np
 import torch
@@ -9,9 +10,43 @@ import hashlib
 import shutil
 from server import PromptServer
 from aiohttp import web
+from ..code.preview_store import PreviewStore, get_preview_store
+from ..code.image_dtype import IMAGE_DTYPES, resolve_image_dtype, images_to_uint8
+from ..code.video_reader import iter_video_frames, read_video_tensor
+from ..code.video_probe import probe_video
+from ..code.video_keyframes import read_frame
 import torchaudio
 import scipy.io.wavfile
 
+# ========================================================
+# API: 视频元数据 (只解析容器头，按文件指纹缓存)
+# ========================================================
+@PromptServer.instance.routes.get("/simple_video/probe")
+async def probe_video_info(request):
+    video_path = request.rel_url.query.get("path", "").strip().strip('"').strip("'")
+    if not video_path: return web.json_response({"error": "No path"}, status=400)
+    if not os.path.isfile(video_path): return web.json_response({"error": "Not found"}, status=404)
+    try:
+        info = await asyncio.get_running_loop().run_in_executor(None, probe_video, video_path)
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
+    return web.json_response(info)
+
+def read_frame_at(video_path, index, fps):
+    """读取第 index 帧：按关键帧索引从目标之前最近的关键帧开始解码，不从头读取。
+
+    帧数是按时长估算的，越界时退回到真正的最后一帧。
+    """
+    frame = read_frame(video_path, index, fps)
+    if frame is None:
+        reader = imageio.get_reader(video_path)
+        try:
+            index = max(0, reader.count_frames() - 1)
+            frame = reader.get_data(index)
+        finally:
+            reader.close()
+    return frame, index
+
 # ========================================================
 # API: 统一预览接口
 # ========================================================
@@ -25,65 +60,49 @@ async def fetch_video_preview(request):
     skip = int(request.rel_url.query.get("skip", 0))
     nth = int(request.rel_url.query.get("nth", 1))
     cap = int(request.rel_url.query.get("cap", 0))
+    start_time = float(request.rel_url.query.get("start", 0))
+    end_time = float(request.rel_url.query.get("end", 0))
 
     if not video_path: return web.json_response({"error": "No path"}, status=400)
     video_path = video_path.strip().strip('"').strip("'")
     if not os.path.exists(video_path): return web.json_response({"error": "Not found"}, status=404)
 
+    # 所有预览文件都放在统一的预览存储中 (按源文件指纹 + 参数寻址，超出容量按访问时间淘汰)
+    # 探测、扫描关键帧和编码都是阻塞操作，放到线程池中执行，不阻塞事件循环
+    store = get_preview_store()
+    loop = asyncio.get_running_loop()
+
     # ------------------------------------------------
     # 模式 A: 原始视频预览 (Index = -1)
     # ------------------------------------------------
     if frame_index == -1:
-        filename = os.path.basename(video_path)
-        file_hash = hashlib.md5(video_path.encode()).hexdigest()[:8]
-        temp_filename = f"preview_original_{file_hash}_{filename}"
-        
-        temp_dir = folder_paths.get_temp_directory()
-        temp_path = os.path.join(temp_dir, temp_filename)
-
-        if not os.path.exists(temp_path):
-            try: os.link(video_path, temp_path)
-            except:
-                try: shutil.copy(video_path, temp_path)
-                except: pass
-        
-        return web.json_response({"filename": temp_filename, "type": "temp", "format": "video"})
+        try:
+            name = store.link(video_path)
+        except Exception as e:
+            return web.json_response({"error": str(e)}, status=500)
+        return web.json_response(PreviewStore.view_info(name, "video"))
 
     # ------------------------------------------------
     # 模式 B: 处理后的视频预览 (Index = 0)
     # ------------------------------------------------
     elif frame_index == 0:
-        param_str = f"{video_path}_{skip}_{nth}_{cap}"
-        file_hash = hashlib.md5(param_str.encode()).hexdigest()[:8]
-        temp_filename = f"preview_processed_{file_hash}.mp4"
-        
-        temp_dir = folder_paths.get_temp_directory()
-        temp_path = os.path.join(temp_dir, temp_filename)
-
-        if os.path.exists(temp_path):
-             return web.json_response({"filename": temp_filename, "type": "temp", "format": "video"})
+        def render_processed(temp_path):
+            fps = probe_video(video_path)["fps"] or 24
 
-        try:
-            reader = imageio.get_reader(video_path)
-            meta = reader.get_meta_data()
-            fps = meta.get('fps', 24)
-            
-            frames_to_save = []
-            count = 0
-            for i, frame in enumerate(reader):
-                if i < skip: continue
-                if (i - skip) % nth != 0: continue
-                frames_to_save.append(frame)
-                count += 1
-                if cap > 0 and count >= cap: break
-            reader.close()
+            # 跳过的帧由 ffmpeg seek 掉，不逐帧解码
+            frames_to_save = list(iter_video_frames(video_path, fps, skip, nth, cap, start_time, end_time))
 
             if len(frames_to_save) == 0:
-                return web.json_response({"error": "No frames found with current settings"}, status=400)
+                raise ValueError("No frames found with current settings")
 
             imageio.mimsave(temp_path, frames_to_save, fps=fps, format="mp4", codec="libx264", quality=5)
-            
-            return web.json_response({"filename": temp_filename, "type": "temp", "format": "video"})
+
+        try:
+            name = await loop.run_in_executor(None, lambda: store.ensure(
+                video_path, "processed", ".mp4", render_processed, skip=skip, nth=nth, cap=cap, start=start_time, end=end_time))
+            return web.json_response(PreviewStore.view_info(name, "video"))
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
         except Exception as e:
              return web.json_response({"error": str(e)}, status=500)
 
@@ -92,27 +111,18 @@ async def fetch_video_preview(request):
     # ------------------------------------------------
     else:
         real_index = frame_index - 1
-        file_hash = hashlib.md5(f"{video_path}_{real_index}".encode()).hexdigest()[:8]
-        temp_filename = f"preview_frame_{file_hash}_{real_index}.png"
-        temp_dir = folder_paths.get_temp_directory()
-        temp_path = os.path.join(temp_dir, temp_filename)
-
-        if os.path.exists(temp_path):
-            return web.json_response({"filename": temp_filename, "type": "temp", "format": "image"})
 
-        try:
-            reader = imageio.get_reader(video_path)
-            total = reader.count_frames()
-            if total == 0: total = 999999
-            
-            target = min(real_index, total - 1)
-            target = max(0, target)
-            
-            frame = reader.get_data(target)
-            reader.close()
+        def render_frame(temp_path):
+            info = probe_video(video_path)
+            total = info["frame_count"] or 999999
+            target = max(0, min(real_index, total - 1))
+            frame, _ = read_frame_at(video_path, target, info["fps"] or 24)
             
             imageio.imwrite(temp_path, frame)
-            return web.json_response({"filename": temp_filename, "type": "temp", "format": "image"})
+
+        try:
+            name = await loop.run_in_executor(None, lambda: store.ensure(video_path, "frame", ".png", render_frame, index=real_index))
+            return web.json_response(PreviewStore.view_info(name, "image"))
         except Exception as e:
             return web.json_response({"error": str(e)}, status=500)
 
@@ -171,7 +181,8 @@ class SimpleVideoSaver:
             except Exception as e:
                 print(f"[SimpleVideoSaver] Failed to create directory {full_output_folder}: {e}")
 
-        image_np = (255. * image.cpu().numpy()).astype(np.uint8)
+        # 逐帧转为 uint8 (输入可以是 float16)，不生成整个批次的 float32 副本
+        image_np = images_to_uint8(image)
         results = []
         audio_path_arg = None
         temp_audio_file = None
@@ -270,12 +281,12 @@ class SimpleVideoSaver:
 
         if not browser_friendly:
             try:
-                preview_filename = f"preview_{filename}_{counter:05}.mp4"
-                preview_path = os.path.join(folder_paths.get_temp_directory(), preview_filename)
                 preview_kwargs = { "fps": frame_rate, "codec": "libx264", "pixelformat": "yuv420p", "ffmpeg_params": ["-preset", "ultrafast", "-crf", "26"] }
                 if audio_path_arg: preview_kwargs["audio"] = audio_path_arg
-                imageio.mimsave(preview_path, image_np, format="mp4", **preview_kwargs)
-                ui_results = [{"filename": preview_filename, "type": "temp", "subfolder": "", "format": "video"}]
+                # 浏览器不能直接播放的格式：为刚保存的文件生成 h264 预览，放入预览存储
+                preview_name = get_preview_store().ensure(full_path, "saved", ".mp4",
+                                                          lambda preview_path: imageio.mimsave(preview_path, image_np, format="mp4", **preview_kwargs))
+                ui_results = [PreviewStore.view_info(preview_name, "video")]
             except: pass
 
         if temp_audio_file and os.path.exists(temp_audio_file):
@@ -304,6 +315,12 @@ class SimpleLoadVideoPath:
                 "select_every_nth": ("INT", {"default": 1, "min": 1, "step": 1}),
                 "select_frame_index": ("INT", {"default": -1, "min": -1, "max": 999999, "step": 1, "tooltip": "-1: 原始视频\n 0: 应用cap/skip/nth后的预览视频\n >0: 提取第n张图(1为第1帧)"}),
             },
+            "optional": {
+                # 按时间选择片段 (秒)，与 skip_first_frames 叠加；end_time 为 0 表示到结尾
+                "start_time": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 1e6, "step": 0.1}),
+                "end_time": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 1e6, "step": 0.1}),
+                "image_dtype": (IMAGE_DTYPES, {"tooltip": "输出图像的精度，default 使用 config.json 中的 image_dtype；float16 内存减半"}),
+            },
         }
 
     RETURN_TYPES = ("IMAGE", "FLOAT", "FLOAT", "INT", "INT", "AUDIO")
@@ -311,59 +328,43 @@ class SimpleLoadVideoPath:
     FUNCTION = "load_video"
     CATEGORY = "🪐supernova/video"
 
-    def load_video(self, video_path, frame_load_cap, skip_first_frames, select_every_nth, select_frame_index):
+    def load_video(self, video_path, frame_load_cap, skip_first_frames, select_every_nth, select_frame_index,
+                   start_time=0.0, end_time=0.0, image_dtype="default"):
         video_path = video_path.strip('"')
         if not os.path.exists(video_path): raise FileNotFoundError(f"Video not found: {video_path}")
+        dtype = resolve_image_dtype(image_dtype)
 
-        reader = imageio.get_reader(video_path)
-        meta = reader.get_meta_data()
-        fps = meta.get('fps', 24)
-        
-        try: total_frames = reader.count_frames()
-        except: total_frames = meta.get('nframes', 999999)
+        # 元数据来自容器头 (按文件指纹缓存)，不为了帧数扫描整个视频
+        meta = probe_video(video_path)
+        fps = meta["fps"] or 24
 
         if select_frame_index > 0:
+            total_frames = meta["frame_count"] or 999999
+
             target_index = select_frame_index - 1
             if total_frames > 0 and target_index >= total_frames:
                 target_index = total_frames - 1
 
-            try: frame = reader.get_data(target_index)
+            try: frame, target_index = read_frame_at(video_path, target_index, fps)
             except Exception as e:
-                reader.close()
                 raise RuntimeError(f"Error reading frame {target_index}: {e}")
-            
-            reader.close()
 
-            frame_norm = frame.astype(np.float32) / 255.0
-            video_tensor = torch.from_numpy(frame_norm).unsqueeze(0)
+            video_tensor = torch.from_numpy(frame).to(dtype).div_(255.0).unsqueeze(0)
             
-            filename = os.path.basename(video_path)
-            file_hash = hashlib.md5(video_path.encode()).hexdigest()[:8]
-            preview_filename = f"preview_frame_{target_index}_{file_hash}.png"
-            temp_dir = folder_paths.get_temp_directory()
-            preview_path = os.path.join(temp_dir, preview_filename)
-            imageio.imwrite(preview_path, frame)
+            preview_name = get_preview_store().ensure(video_path, "frame", ".png", lambda temp_path: imageio.imwrite(temp_path, frame), index=target_index)
 
             return {
-                "ui": {"video_preview": [{"filename": preview_filename, "type": "temp", "format": "image"}]}, 
+                "ui": {"video_preview": [PreviewStore.view_info(preview_name, "image")]}, 
                 "result": (video_tensor, 1, int(fps), video_tensor.shape[2], video_tensor.shape[1], None)
             }
 
         else:
-            frames = []
-            count = 0
-            try:
-                for i, f in enumerate(reader):
-                    if i < skip_first_frames: continue
-                    if (i - skip_first_frames) % select_every_nth != 0: continue
-                    frames.append(f.astype(np.float32) / 255.0)
-                    count += 1
-                    if frame_load_cap > 0 and count >= frame_load_cap: break
-            finally:
-                reader.close()
-            
-            if not frames: raise ValueError("No frames loaded")
-            video_tensor = torch.from_numpy(np.array(frames))
+            # ffmpeg 输入 -ss 跳过开头、select 滤镜抽帧，未选中的帧不会解码进 Python；
+            # 帧直接转换进按元数据预分配的张量
+            video_tensor = read_video_tensor(video_path, fps, int(skip_first_frames), select_every_nth, int(frame_load_cap),
+                                             start_time, end_time, dtype=dtype, duration=meta["duration"])
+            if video_tensor is None: raise ValueError("No frames loaded")
+            count = video_tensor.shape[0]
             
             audio_output = None
             try:
@@ -371,31 +372,21 @@ class SimpleLoadVideoPath:
                 audio_output = {"waveform": waveform.unsqueeze(0), "sample_rate": sample_rate}
             except: pass
 
-            filename = os.path.basename(video_path)
-            file_hash = hashlib.md5(video_path.encode()).hexdigest()[:8]
-            
+            store = get_preview_store()
             if select_frame_index == 0:
-                param_str = f"{video_path}_{skip_first_frames}_{select_every_nth}_{frame_load_cap}"
-                mod_hash = hashlib.md5(param_str.encode()).hexdigest()[:8]
-                temp_filename = f"preview_processed_{mod_hash}.mp4"
-                temp_dir = folder_paths.get_temp_directory()
-                temp_path = os.path.join(temp_dir, temp_filename)
-                
-                if not os.path.exists(temp_path):
-                     frames_uint8 = (video_tensor.numpy() * 255).astype(np.uint8)
-                     imageio.mimsave(temp_path, frames_uint8, fps=fps, format="mp4", codec="libx264", pixelformat="yuv420p", quality=5)
+                def render_processed(temp_path):
+                    frames_uint8 = images_to_uint8(video_tensor)
+                    imageio.mimsave(temp_path, frames_uint8, fps=fps, format="mp4", codec="libx264", pixelformat="yuv420p", quality=5)
+                # 参数与 /simple_video/fetch_preview 模式 B 一致，节点执行与前端预览共用同一个条目
+                preview_name = store.ensure(video_path, "processed", ".mp4", render_processed,
+                                            skip=int(skip_first_frames), nth=select_every_nth, cap=int(frame_load_cap),
+                                            start=float(start_time), end=float(end_time))
             else:
-                temp_filename = f"preview_original_{file_hash}_{filename}"
-                temp_dir = folder_paths.get_temp_directory()
-                temp_path = os.path.join(temp_dir, temp_filename)
-                if not os.path.exists(temp_path):
-                    try: os.link(video_path, temp_path)
-                    except:
-                         try: shutil.copy(video_path, temp_path)
-                         except: pass
+                try: preview_name = store.link(video_path)
+                except Exception: preview_name = None
 
             return {
-                "ui": {"video_preview": [{"filename": temp_filename, "type": "temp", "format": "video"}]}, 
+                "ui": {"video_preview": [PreviewStore.view_info(preview_name, "video")] if preview_name else []}, 
                 "result": (video_tensor, count, int(fps), video_tensor.shape[2], video_tensor.shape[1], audio_output)
             }
 
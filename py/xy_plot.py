@@ -3,6 +3,7 @@
 
 import os
 import sys
+import io
 import torch
 from PIL import Image, ImageDraw, ImageFont, ImageOps
 import numpy as np
@@ -10,7 +11,13 @@ import comfy.samplers
 import comfy.sd
 import comfy.utils
 import folder_paths
-from nodes import KSampler, VAEDecode, CLIPTextEncode
+import comfy.model_management
+from nodes import KSampler, VAEDecode, VAEDecodeTiled, CLIPTextEncode
+from ..code.xy_distributed import parse_worker_urls, run_distributed
+from ..code.xy_spec import parse_number_spec, parse_name_spec, parse_sampler_spec, parse_prompt_sr_spec
+from ..code.xy_memory import CellResourceScheduler, PeakMemoryMonitor, GB, release_memory
+from ..code.ckpt_components import CheckpointComponentLoader, COMPONENT_MODES
+from ..code.image_dtype import to_image_dtype
 
 # ======================================================================================================================
 # 全局变量和辅助函数
@@ -32,6 +39,18 @@ if not os.path.exists(font_path):
 XYPLOT_LIM = 50
 XYPLOT_DEF = 3
 
+# 批量输入节点的紧凑范围表达式 (填写后忽略逐个槽位，且不受 XYPLOT_LIM 限制)
+def spec_input(placeholder):
+    return ("STRING", {"default": "", "multiline": True, "placeholder": placeholder,
+                       "tooltip": "可选：范围表达式。非空时忽略下面的逐个槽位，没有 50 个值的上限。"})
+
+def spec_value(xy_type, values):
+    """范围表达式的节点输出；没有匹配到任何取值时与空槽位一样返回 (None,)。"""
+    if len(values) == 0:
+        print(f"XY Plot: {xy_type} 范围表达式没有产生任何取值，忽略该轴。")
+        return (None,)
+    return ((xy_type, values),)
+
 LORA_EXTENSIONS = ['.safetensors', '.ckpt']
 try:
     xy_batch_default_path = os.path.abspath(os.sep)
@@ -76,6 +95,183 @@ def get_batch_files(directory_path, valid_extensions, include_subdirs=False):
         print(f"在 {directory_path} 中列出文件时出错: {e}")
     return batch_files
 
+def load_vae_for_cell(vae_name):
+    vae_path = folder_paths.get_full_path("vae", vae_name)
+    try:
+        return comfy.sd.VAE(sd=comfy.utils.load_torch_file(vae_path))
+    except Exception as e:
+        print(f"加载 VAE '{vae_name}' 失败: {e}")
+        return None
+
+# 显存不足时依次尝试的分块解码尺寸 (像素)
+TILED_DECODE_SIZES = [512, 256, 128]
+SAMPLE_OOM_RETRIES = 1
+
+def is_oom_error(e):
+    oom_type = getattr(comfy.model_management, "OOM_EXCEPTION", None)
+    if oom_type is not None and isinstance(e, oom_type): return True
+    return "out of memory" in str(e).lower()
+
+def sample_with_retry(model, cell, positive, negative, latent_image):
+    """执行 KSampler；显存不足时卸载已缓存的模型后重试。"""
+    for attempt in range(SAMPLE_OOM_RETRIES + 1):
+        try:
+            return KSampler().sample(model, cell["seed"], cell["steps"], cell["cfg"], cell["sampler_name"], cell["scheduler"], positive, negative, latent_image, denoise=cell["denoise"])[0]
+        except Exception as e:
+            if not is_oom_error(e) or attempt >= SAMPLE_OOM_RETRIES: raise
+            print(f"XY Plot: 采样显存不足，释放缓存模型后重试 ({attempt + 1}/{SAMPLE_OOM_RETRIES})")
+            release_memory(unload_models=True)
+
+def decode_with_retry(vae, latent):
+    """执行 VAEDecode；显存不足时改用分块解码，并逐步缩小分块尺寸。"""
+    try:
+        return VAEDecode().decode(vae, latent)[0]
+    except Exception as e:
+        if not is_oom_error(e): raise
+        last_error = e
+    for tile_size in TILED_DECODE_SIZES:
+        print(f"XY Plot: 解码显存不足，改用分块解码 (tile_size={tile_size})")
+        release_memory()
+        try:
+            return VAEDecodeTiled().decode(vae, latent, tile_size, overlap=tile_size // 8)[0]
+        except Exception as e:
+            if not is_oom_error(e): raise
+            last_error = e
+    raise last_error
+
+def make_failed_placeholder(width, height, batch_size, message):
+    """生成与正常单元格同尺寸的失败占位图，并在图上标注错误信息。"""
+    img = Image.new('RGB', (width, height), (40, 0, 0))
+    draw = ImageDraw.Draw(img)
+    size = max(12, int(min(width, height) * 0.05))
+    try:
+        font = ImageFont.truetype(font_path, size) if font_path else ImageFont.load_default()
+    except Exception:
+        font = ImageFont.load_default()
+    draw.text((width / 2, height / 2 - size), "FAILED", font=font, fill=(255, 80, 80), anchor="mm")
+    detail = message if len(message) <= 60 else message[:57] + "..."
+    draw.text((width / 2, height / 2 + size), detail, font=font, fill=(255, 200, 200), anchor="mm")
+    return pil2tensor(img).repeat(batch_size, 1, 1, 1)
+
+def clip_key(cell, shared_clip=False):
+    """标识单元格实际使用的 CLIP：来自哪个 Checkpoint，以及叠加了哪些影响 CLIP 的 LoRA。
+
+    shared_clip=True 表示 Checkpoint 轴复用 XY Plot 输入的 CLIP，此时忽略 Checkpoint。
+    """
+    loras = tuple((str(path), clip_str) for path, _, clip_str in cell["lora_stack"] if clip_str)
+    return (None if shared_clip else cell["ckpt_name"], loras)
+
+class PromptEncodingCache:
+    """按 (CLIP, 文本) 缓存提示词编码。
+
+    计划中同一个 CLIP 的全部正/负提示词变体会先去重，在第一个用到该 CLIP 的单元格里一次性编码，
+    之后的单元格直接取用，不再为每个单元格重复调用 CLIPTextEncode。
+    """
+    def __init__(self, plan, shared_clip=False):
+        self.shared_clip = shared_clip
+        self.variants = {}
+        for cell in plan:
+            texts = self.variants.setdefault(clip_key(cell, shared_clip), {})
+            texts.setdefault(cell["positive"]); texts.setdefault(cell["negative"])
+        self.conds = {}
+
+    def encode(self, cell, clip):
+        key = clip_key(cell, self.shared_clip)
+        pending = [t for t in self.variants.get(key, {}) if (key, t) not in self.conds]
+        for text in (cell["positive"], cell["negative"]):
+            if text not in pending and (key, text) not in self.conds: pending.append(text)
+        if pending:
+            print(f"XY Plot: 编码 {len(pending)} 个不同的提示词变体")
+            encoder = CLIPTextEncode()
+            for text in pending:
+                self.conds[(key, text)] = encoder.encode(clip, text)[0]
+        return self.conds[(key, cell["positive"])], self.conds[(key, cell["negative"])]
+
+def sample_key(cell):
+    """除 VAE 以外影响采样结果的全部参数；相同 key 的单元格可以共用同一次采样得到的 Latent。"""
+    return repr((cell["ckpt_name"], [tuple(l) for l in cell["lora_stack"]], cell["seed"], cell["steps"], cell["cfg"],
+                 cell["sampler_name"], cell["scheduler"], cell["denoise"], cell["positive"], cell["negative"]))
+
+class LatentReuseCache:
+    """采样一次、解码多次：保存仍有单元格 (仅 VAE 不同) 需要的 Latent，最后一个用完后立即释放。"""
+    def __init__(self, plan):
+        self.remaining = {}
+        for cell in plan:
+            key = sample_key(cell)
+            self.remaining[key] = self.remaining.get(key, 0) + 1
+        self.latents = {}
+
+    def get(self, cell):
+        return self.latents.get(sample_key(cell))
+
+    def put(self, cell, latent):
+        key = sample_key(cell)
+        if self.remaining.get(key, 0) > 1: self.latents[key] = latent
+
+    def finish_cell(self, cell):
+        key = sample_key(cell)
+        self.remaining[key] = self.remaining.get(key, 0) - 1
+        if self.remaining[key] <= 0: self.latents.pop(key, None)
+
+LORA_AXIS_TYPES = ["LoRA Batch", "LoRA Wt", "LoRA MStr", "LoRA CStr"]
+
+def resolve_cell(X_type, x_val, Y_type, y_val, base):
+    """根据 X/Y 两个轴的取值解析出单个单元格的生成参数 (只解析，不加载任何模型)。"""
+    cell = dict(base)
+    cell.update({"ckpt_name": None, "vae_name": None, "lora_stack": []})
+    lora_stack = cell["lora_stack"]
+    lora_types = LORA_AXIS_TYPES
+
+    is_mstr_cstr_plot = (X_type == "LoRA MStr" and Y_type == "LoRA CStr") or (X_type == "LoRA CStr" and Y_type == "LoRA MStr")
+    if is_mstr_cstr_plot:
+        try:
+            lora_path = x_val[0][0] 
+            m_str = x_val[0][1] if X_type == "LoRA MStr" else y_val[0][1]
+            c_str = y_val[0][2] if Y_type == "LoRA CStr" else x_val[0][2]
+            lora_stack.append((lora_path, m_str, c_str))
+        except: pass 
+    elif X_type == "LoRA Batch" and Y_type in lora_types:
+        lora_path = x_val[0][0]
+        m_str = y_val if Y_type == "LoRA MStr" else (y_val if Y_type == "LoRA Wt" else x_val[0][1])
+        c_str = y_val if Y_type == "LoRA CStr" else (y_val if Y_type == "LoRA Wt" else x_val[0][2])
+        lora_stack.append((lora_path, m_str, c_str))
+    elif Y_type == "LoRA Batch" and X_type in lora_types:
+        lora_path = y_val[0][0]
+        m_str = x_val if X_type == "LoRA MStr" else (x_val if X_type == "LoRA Wt" else y_val[0][1])
+        c_str = x_val if X_type == "LoRA CStr" else (x_val if X_type == "LoRA Wt" else y_val[0][2])
+        lora_stack.append((lora_path, m_str, c_str))
+    else:
+        for param_type, param_val in [(X_type, x_val), (Y_type, y_val)]:
+            if not param_val and param_val != 0: continue
+            if param_type == "Seeds++ Batch": cell["seed"] += param_val
+            elif param_type == "Steps": cell["steps"] = param_val
+            elif param_type == "CFG Scale": cell["cfg"] = param_val
+            elif param_type == "Denoise": cell["denoise"] = param_val
+            elif param_type == "Sampler":
+                cell["sampler_name"], scheduler_override = param_val
+                if scheduler_override: cell["scheduler"] = scheduler_override
+            elif param_type == "Scheduler":
+                cell["scheduler"] = param_val[0] if isinstance(param_val, tuple) else param_val
+            elif param_type in lora_types:
+                lora_stack.extend(param_val)
+            elif param_type == "PromptSR":
+                search_txt, replace_txt = param_val
+                cell["positive"] = cell["positive"].replace(search_txt, replace_txt)
+                cell["negative"] = cell["negative"].replace(search_txt, replace_txt)
+            elif param_type == "Checkpoint": cell["ckpt_name"] = param_val
+            elif param_type == "VAE": cell["vae_name"] = param_val
+    return cell
+
+def build_cell_plan(X_type, X_value, Y_type, Y_value, base):
+    """按网格顺序 (先行后列) 生成全部单元格的参数列表。"""
+    plan = []
+    for y_idx, y_val in enumerate(Y_value):
+        for x_idx, x_val in enumerate(X_value):
+            cell = resolve_cell(X_type, x_val, Y_type, y_val, base)
+            cell.update({"index": len(plan), "x_idx": x_idx, "y_idx": y_idx})
+            plan.append(cell)
+    return plan
+
 # ======================================================================================================================
 # 核心 XY Plot 节点 
 # ======================================================================================================================
@@ -113,6 +309,7 @@ class StandaloneXYPlot:
         else:
             grid_spacing, xy_flip, y_label_orientation = 10, "False", "Horizontal"
             settings_font_size, settings_font_path = 0, ""
+            XY_PLOT_SETTINGS = {}
         
         X_type, X_value = X if X else ("Nothing", [""])
         Y_type, Y_value = Y if Y else ("Nothing", [""])
@@ -125,94 +322,52 @@ class StandaloneXYPlot:
             print("XY Plot 错误：X 和 Y 输入类型必须不同。")
             return (None, None)
 
-        image_pil_list, image_tensor_list = [], []
-        
-        # 2. 生成循环 (这部分逻辑保持不变)
-        for y_idx, y_val in enumerate(Y_value):
-            for x_idx, x_val in enumerate(X_value):
-                current_seed, current_steps, current_cfg = seed, steps, cfg
-                current_sampler, current_scheduler, current_denoise = sampler_name, scheduler, denoise
-                current_model, current_clip = model.clone(), clip.clone()
-                current_vae = vae
-                pos_prompt, neg_prompt = positive_text, negative_text
-                
-                lora_stack = []
-                lora_types = ["LoRA Batch", "LoRA Wt", "LoRA MStr", "LoRA CStr"]
-                
-                temp_params = [(X_type, x_val), (Y_type, y_val)]
-                
-                is_mstr_cstr_plot = (X_type == "LoRA MStr" and Y_type == "LoRA CStr") or (X_type == "LoRA CStr" and Y_type == "LoRA MStr")
-                if is_mstr_cstr_plot:
-                    try:
-                        lora_path = x_val[0][0] 
-                        m_str = x_val[0][1] if X_type == "LoRA MStr" else y_val[0][1]
-                        c_str = y_val[0][2] if Y_type == "LoRA CStr" else x_val[0][2]
-                        lora_stack = [(lora_path, m_str, c_str)]
-                    except: pass 
-                elif X_type == "LoRA Batch" and Y_type in lora_types:
-                    lora_path = x_val[0][0]
-                    m_str = y_val if Y_type == "LoRA MStr" else (y_val if Y_type == "LoRA Wt" else x_val[0][1])
-                    c_str = y_val if Y_type == "LoRA CStr" else (y_val if Y_type == "LoRA Wt" else x_val[0][2])
-                    lora_stack = [(lora_path, m_str, c_str)]
-                elif Y_type == "LoRA Batch" and X_type in lora_types:
-                    lora_path = y_val[0][0]
-                    m_str = x_val if X_type == "LoRA MStr" else (x_val if X_type == "LoRA Wt" else y_val[0][1])
-                    c_str = x_val if X_type == "LoRA CStr" else (x_val if X_type == "LoRA Wt" else y_val[0][2])
-                    lora_stack = [(lora_path, m_str, c_str)]
-                else:
-                    for param_type, param_val in temp_params:
-                        if not param_val and param_val != 0: continue
-                        if param_type == "Seeds++ Batch": current_seed += param_val
-                        elif param_type == "Steps": current_steps = param_val
-                        elif param_type == "CFG Scale": current_cfg = param_val
-                        elif param_type == "Denoise": current_denoise = param_val
-                        elif param_type == "Sampler":
-                            current_sampler, scheduler_override = param_val
-                            if scheduler_override: current_scheduler = scheduler_override
-                        elif param_type == "Scheduler":
-                            current_scheduler = param_val[0] if isinstance(param_val, tuple) else param_val
-                        elif param_type in lora_types:
-                            lora_stack.extend(param_val)
-                        elif param_type == "PromptSR":
-                            search_txt, replace_txt = param_val
-                            pos_prompt = pos_prompt.replace(search_txt, replace_txt)
-                            neg_prompt = neg_prompt.replace(search_txt, replace_txt)
-                        elif param_type == "Checkpoint":
-                            ckpt_name = param_val
-                            ckpt_path = folder_paths.get_full_path("checkpoints", ckpt_name)
-                            try:
-                                out = comfy.sd.load_checkpoint_guess_config(ckpt_path, output_vae=True, output_clip=True, embedding_directory=folder_paths.get_folder_paths("embeddings"))
-                                current_model, current_clip, current_vae = out[:3]
-                            except Exception as e: print(f"加载 Checkpoint '{ckpt_name}' 失败: {e}")
-                        elif param_type == "VAE":
-                            vae_name = param_val
-                            vae_path = folder_paths.get_full_path("vae", vae_name)
-                            try:
-                                current_vae = comfy.sd.VAE(sd=comfy.utils.load_torch_file(vae_path))
-                            except Exception as e: print(f"加载 VAE '{vae_name}' 失败: {e}")
-                
-                if lora_stack:
-                    for lora_path, model_str, clip_str in lora_stack:
-                        if lora_path is None or str(lora_path).lower() == 'none' or not str(lora_path).strip(): continue
-                        if os.path.exists(lora_path) and os.path.isfile(lora_path):
-                            try:
-                                lora_data = comfy.utils.load_torch_file(lora_path)
-                                lora_model, lora_clip = comfy.sd.load_lora_for_models(current_model, current_clip, lora_data, model_str, clip_str)
-                                current_model, current_clip = lora_model, lora_clip
-                            except Exception as e: print(f"加载 LoRA '{os.path.basename(lora_path)}' 失败: {e}")
-                
-                positive_cond, negative_cond = CLIPTextEncode().encode(current_clip, pos_prompt)[0], CLIPTextEncode().encode(current_clip, neg_prompt)[0]
-                print(f"正在生成: X={x_idx}, Y={y_idx} | Seed={current_seed}")
-                
-                try:
-                    latent_out = KSampler().sample(current_model, current_seed, current_steps, current_cfg, current_sampler, current_scheduler, positive_cond, negative_cond, latent_image, denoise=current_denoise)[0]
-                    image = VAEDecode().decode(current_vae, latent_out)[0]
-                    image_tensor_list.append(image)
-                    image_pil_list.append(tensor2pil(image))
-                except Exception as e:
-                    print(f"生成失败 X={x_idx}, Y={y_idx}: {e}")
-                    image_pil_list.append(Image.new('RGB', (512, 512), (0, 0, 0)))
-                    image_tensor_list.append(torch.zeros((1, 512, 512, 3)))
+        # 2. 生成单元格计划，然后逐格执行 (可选：分发到多个 worker)
+        base = {
+            "seed": seed, "steps": steps, "cfg": cfg, "sampler_name": sampler_name, "scheduler": scheduler,
+            "denoise": denoise, "positive": positive_text, "negative": negative_text,
+        }
+        plan = build_cell_plan(X_type, X_value, Y_type, Y_value, base)
+        results = {}
+
+        worker_urls = parse_worker_urls(XY_PLOT_SETTINGS.get("worker_urls", ""))
+        if worker_urls:
+            results.update(self.run_on_workers(plan, worker_urls, latent_image, XY_PLOT_SETTINGS))
+
+        local_plan = [cell for cell in plan if cell["index"] not in results]
+        ckpt_loader = CheckpointComponentLoader(XY_PLOT_SETTINGS.get("ckpt_clip", "checkpoint"), XY_PLOT_SETTINGS.get("ckpt_vae", "checkpoint"), clip, vae)
+        resources = CellResourceScheduler(local_plan, {"ckpt": ckpt_loader, "vae": load_vae_for_cell},
+                                          XY_PLOT_SETTINGS.get("ram_budget_gb", 0), XY_PLOT_SETTINGS.get("vram_budget_gb", 0),
+                                          keep=(model, clip, vae))
+        prompts = PromptEncodingCache(local_plan, shared_clip=XY_PLOT_SETTINGS.get("ckpt_clip") == "plot input")
+        latents = LatentReuseCache(local_plan)
+        peak_ram = peak_vram = 0
+        try:
+            for cell in resources.execution_order(local_plan, group_key=sample_key):
+                with PeakMemoryMonitor() as monitor:
+                    results[cell["index"]] = self.run_cell(cell, model, clip, vae, latent_image, resources, prompts, latents)
+                    latents.finish_cell(cell)
+                    resources.finish_cell(cell)
+                print(f"XY Plot 单元格 X={cell['x_idx']}, Y={cell['y_idx']} 峰值内存: RAM {monitor.peak_ram / GB:.2f} GB, VRAM {monitor.peak_vram / GB:.2f} GB")
+                peak_ram, peak_vram = max(peak_ram, monitor.peak_ram), max(peak_vram, monitor.peak_vram)
+        finally:
+            resources.close()
+        if local_plan:
+            print(f"XY Plot 本地 {len(local_plan)} 个单元格完成，整体峰值: RAM {peak_ram / GB:.2f} GB, VRAM {peak_vram / GB:.2f} GB")
+
+        # 重试后仍失败的单元格用同尺寸的标注占位图代替，保证网格几何不被破坏
+        done = [image for image in results.values() if image is not None]
+        if done:
+            ref_batch, ref_height, ref_width = done[0].shape[0], done[0].shape[1], done[0].shape[2]
+        else:
+            samples = latent_image["samples"]
+            ref_batch, ref_height, ref_width = samples.shape[0], samples.shape[-2] * 8, samples.shape[-1] * 8
+        for cell in plan:
+            if results.get(cell["index"]) is None:
+                results[cell["index"]] = make_failed_placeholder(ref_width, ref_height, ref_batch, cell.get("error", "unknown error"))
+
+        image_tensor_list = [results[cell["index"]] for cell in plan]
+        image_pil_list = [tensor2pil(image) for image in image_tensor_list]
                 
         if not image_pil_list: return (None, None)
 
@@ -336,7 +491,114 @@ class StandaloneXYPlot:
                     draw.text((x_offset_initial / 2, y_offset + i_height / 2), Y_label[row], font=font, fill="black", anchor="mm")
             y_offset += i_height + grid_spacing
         
-        return (pil2tensor(background), torch.cat(image_tensor_list, dim=0))
+        return (to_image_dtype(pil2tensor(background)), to_image_dtype(torch.cat(image_tensor_list, dim=0)))
+    
+    def run_cell(self, cell, model, clip, vae, latent_image, resources, prompts, latents):
+        """在本地执行单个单元格：取得 Checkpoint/VAE，叠加 LoRA，编码提示词，采样并解码。
+
+        Checkpoint 和 VAE 由调度器统一加载和释放；这里创建的克隆在函数返回后即被释放。
+        如果只有 VAE 不同的单元格已经采样过，直接用新的 VAE 解码缓存的 Latent。
+        """
+        current_vae = vae
+        if cell["ckpt_name"]:
+            loaded = resources.get("ckpt", cell["ckpt_name"])
+            if loaded: current_vae = loaded[2]
+        if cell["vae_name"]:
+            loaded = resources.get("vae", cell["vae_name"])
+            if loaded: current_vae = loaded
+
+        latent_out = latents.get(cell)
+        if latent_out is not None:
+            print(f"正在解码: X={cell['x_idx']}, Y={cell['y_idx']} | 复用已采样的 Latent (仅 VAE 不同)")
+            try:
+                return decode_with_retry(current_vae, latent_out)
+            except comfy.model_management.InterruptProcessingException:
+                raise
+            except Exception as e:
+                print(f"解码失败 X={cell['x_idx']}, Y={cell['y_idx']}: {e}")
+                cell["error"] = str(e) or type(e).__name__
+                return None
+
+        current_model, current_clip = model, clip
+
+        if cell["ckpt_name"]:
+            loaded = resources.get("ckpt", cell["ckpt_name"])
+            if loaded: current_model, current_clip = loaded[:2]
+
+        current_model, current_clip = current_model.clone(), current_clip.clone()
+
+        for lora_path, model_str, clip_str in cell["lora_stack"]:
+            if lora_path is None or str(lora_path).lower() == 'none' or not str(lora_path).strip(): continue
+            if os.path.exists(lora_path) and os.path.isfile(lora_path):
+                try:
+                    lora_data = comfy.utils.load_torch_file(lora_path)
+                    current_model, current_clip = comfy.sd.load_lora_for_models(current_model, current_clip, lora_data, model_str, clip_str)
+                except Exception as e: print(f"加载 LoRA '{os.path.basename(lora_path)}' 失败: {e}")
+
+        positive_cond, negative_cond = prompts.encode(cell, current_clip)
+        print(f"正在生成: X={cell['x_idx']}, Y={cell['y_idx']} | Seed={cell['seed']}")
+
+        try:
+            latent_out = sample_with_retry(current_model, cell, positive_cond, negative_cond, latent_image)
+            latents.put(cell, latent_out)
+            return decode_with_retry(current_vae, latent_out)
+        except comfy.model_management.InterruptProcessingException:
+            raise
+        except Exception as e:
+            print(f"生成失败 X={cell['x_idx']}, Y={cell['y_idx']}: {e}")
+            cell["error"] = str(e) or type(e).__name__
+            return None
+
+    def run_on_workers(self, plan, worker_urls, latent_image, settings):
+        """把单元格计划分片提交给其它 ComfyUI 实例，返回 {单元格序号: 图像张量}。
+
+        worker 需要能用自己的加载器重建模型，所以只支持空 Latent、worker 端存在的 LoRA，
+        并且必须在设置节点里指定 worker 使用的基础 Checkpoint。无法分发的单元格留在本地执行。
+        """
+        base_ckpt = settings.get("worker_checkpoint", "None")
+        if not base_ckpt or base_ckpt == "None":
+            print("XY Plot 分布式: 未设置 worker_checkpoint，全部单元格在本地执行。")
+            return {}
+
+        samples = latent_image["samples"]
+        if samples.dim() != 4 or torch.count_nonzero(samples) != 0 or "noise_mask" in latent_image:
+            print("XY Plot 分布式: 只支持空 Latent 输入，全部单元格在本地执行。")
+            return {}
+        latent_info = {
+            "class_type": "EmptyLatentImage" if samples.shape[1] == 4 else "EmptySD3LatentImage",
+            "width": samples.shape[3] * 8, "height": samples.shape[2] * 8, "batch_size": samples.shape[0],
+        }
+
+        lora_roots = [os.path.abspath(p) for p in folder_paths.get_folder_paths("loras")]
+        def lora_name_for_worker(lora_path):
+            full = os.path.abspath(str(lora_path))
+            for root in lora_roots:
+                if full.startswith(root + os.sep):
+                    return os.path.relpath(full, root).replace("\\", "/")
+            return None
+
+        remote_cells = []
+        for cell in plan:
+            loras = []
+            for lora_path, model_str, clip_str in cell["lora_stack"]:
+                if lora_path is None or str(lora_path).lower() == 'none' or not str(lora_path).strip(): continue
+                loras.append((lora_name_for_worker(lora_path), model_str, clip_str))
+            if any(name is None for name, _, _ in loras): continue
+            remote_cells.append(dict(cell, lora_stack=loras))
+
+        print(f"XY Plot 分布式: {len(remote_cells)}/{len(plan)} 个单元格分发到 {len(worker_urls)} 个 worker")
+        blobs = run_distributed(remote_cells, worker_urls, base_ckpt, latent_info,
+                                timeout=settings.get("worker_timeout", 3600),
+                                check_interrupt=comfy.model_management.throw_exception_if_processing_interrupted)
+
+        results = {}
+        for index, images in blobs.items():
+            try:
+                tensors = [pil2tensor(Image.open(io.BytesIO(data)).convert("RGB")) for data in images]
+                results[index] = torch.cat(tensors, dim=0)
+            except Exception as e:
+                print(f"XY Plot 分布式: 无法解码单元格 {index} 的结果: {e}")
+        return results
     
 # ======================================================================================================================
 # XY Plot 设置节点
@@ -352,19 +614,38 @@ class XYPlotSettings:
                 "y_label_orientation": (["Horizontal", "Vertical"],),
                 "font_size": ("INT", {"default": 50, "min": 0, "max": 500, "step": 1, "label": "font_size (0=Auto)"}),
                 "font_path": ("STRING", {"default": "", "multiline": False, "placeholder": "e.g. C:/Windows/Fonts/arial.ttf"}),
+            },
+            "optional": {
+                # 分布式模式：填写其它 ComfyUI 实例的地址后，单元格会被切分并通过 /prompt 接口提交给它们
+                "worker_urls": ("STRING", {"default": "", "multiline": True, "placeholder": "e.g. 127.0.0.1:8189, 127.0.0.1:8190", "tooltip": "留空则全部在本地生成。多个地址用逗号或换行分隔。"}),
+                "worker_checkpoint": (["None"] + folder_paths.get_filename_list("checkpoints"), {"tooltip": "worker 用来重建 model/clip/vae 的 Checkpoint (需与本地输入的模型一致)"}),
+                "worker_timeout": ("INT", {"default": 3600, "min": 10, "max": 86400, "step": 10, "tooltip": "每个分片的最长等待时间 (秒)"}),
+                # 内存预算：超出时在单元格之间卸载已缓存的模型 (0 = 不限制)
+                "ram_budget_gb": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 4096.0, "step": 0.5, "tooltip": "进程内存预算 (GB)，0 为不限制"}),
+                "vram_budget_gb": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 1024.0, "step": 0.5, "tooltip": "显存预算 (GB)，0 为不限制"}),
+                # Checkpoint 轴的组件来源：plot input 直接用 XY Plot 输入的 CLIP/VAE，shared (auto) 按指纹复用相同组件
+                "ckpt_clip": (COMPONENT_MODES, {"tooltip": "Checkpoint 轴的 CLIP 来源。非 checkpoint 时只读取每个 Checkpoint 的 UNet"}),
+                "ckpt_vae": (COMPONENT_MODES, {"tooltip": "Checkpoint 轴的 VAE 来源。非 checkpoint 时只读取每个 Checkpoint 的 UNet"}),
             }
         }
     RETURN_TYPES = ("XY_PLOT_SETTINGS",)
     FUNCTION = "get_settings"
     CATEGORY = "🪐supernova/XY Plot"
 
-    def get_settings(self, grid_spacing, xy_flip, y_label_orientation, font_size, font_path):
+    def get_settings(self, grid_spacing, xy_flip, y_label_orientation, font_size, font_path, worker_urls="", worker_checkpoint="None", worker_timeout=3600, ram_budget_gb=0.0, vram_budget_gb=0.0, ckpt_clip="checkpoint", ckpt_vae="checkpoint"):
         settings_dict = {
             "grid_spacing": grid_spacing,
             "xy_flip": xy_flip,
             "y_label_orientation": y_label_orientation,
             "font_size": font_size,
             "font_path": font_path,
+            "worker_urls": worker_urls,
+            "worker_checkpoint": worker_checkpoint,
+            "worker_timeout": worker_timeout,
+            "ram_budget_gb": ram_budget_gb,
+            "vram_budget_gb": vram_budget_gb,
+            "ckpt_clip": ckpt_clip,
+            "ckpt_vae": ckpt_vae,
         }
         return (settings_dict,)
 
@@ -489,13 +770,18 @@ class TSC_XYplot_Sampler_Scheduler:
         # 3. 最后插入 input_count，这样它就会出现在节点的最底部
         # 充当了“缓冲地带”的作用，防止下拉菜单被遮挡
         inputs["required"]["input_count"] = ("INT", {"default": XYPLOT_DEF, "min": 0, "max": XYPLOT_LIM})
+        inputs["optional"] = {"spec": spec_input("e.g. dpmpp_2m*@karras, euler*, re:^dpm_")}
         
         return inputs
 
     RETURN_TYPES, RETURN_NAMES, FUNCTION, CATEGORY = ("XY",), ("X or Y",), "xy_value", "🪐supernova/XY Plot/Inputs"
     
-    def xy_value(self, target_parameter, input_count, **kwargs):
+    def xy_value(self, target_parameter, input_count, spec="", **kwargs):
         xy_value, xy_type = [], ""
+        if spec.strip():
+            xy_type = "Scheduler" if target_parameter == "scheduler" else "Sampler"
+            xy_value = parse_sampler_spec(spec, lambda: comfy.samplers.KSampler.SAMPLERS, lambda: comfy.samplers.KSampler.SCHEDULERS, target_parameter)
+            return spec_value(xy_type, xy_value)
         if target_parameter == "scheduler":
             xy_type, values = "Scheduler", [kwargs.get(f"scheduler_{i}") for i in range(1, input_count + 1)]
             xy_value = [v for v in values if v != "None"]
@@ -770,6 +1056,7 @@ class XY_Input_Seeds_Batch:
         
         # 2. 底部插入计数器
         inputs["required"]["input_count"] = ("INT", {"default": XYPLOT_DEF, "min": 0, "max": XYPLOT_LIM})
+        inputs["optional"] = {"spec": spec_input("e.g. seed: 1000..1200 step 7")}
         return inputs
 
     RETURN_TYPES = ("XY",)
@@ -777,7 +1064,9 @@ class XY_Input_Seeds_Batch:
     FUNCTION = "xy_value"
     CATEGORY = "🪐supernova/XY Plot/Inputs"
 
-    def xy_value(self, input_count, **kwargs):
+    def xy_value(self, input_count, spec="", **kwargs):
+        if spec.strip():
+            return spec_value("Seeds++ Batch", parse_number_spec(spec, int))
         # 收集非0的种子
         seeds = []
         for i in range(1, input_count + 1):
@@ -796,6 +1085,7 @@ class XY_Input_Checkpoint_Batch:
             inputs["required"][f"ckpt_name_{i}"] = (ckpts,)
             
         inputs["required"]["input_count"] = ("INT", {"default": XYPLOT_DEF, "min": 0, "max": XYPLOT_LIM})
+        inputs["optional"] = {"spec": spec_input("e.g. sdxl/*.safetensors, re:^anime_")}
         return inputs
 
     RETURN_TYPES = ("XY",)
@@ -803,7 +1093,9 @@ class XY_Input_Checkpoint_Batch:
     FUNCTION = "xy_value"
     CATEGORY = "🪐supernova/XY Plot/Inputs"
 
-    def xy_value(self, input_count, **kwargs):
+    def xy_value(self, input_count, spec="", **kwargs):
+        if spec.strip():
+            return spec_value("Checkpoint", parse_name_spec(spec, lambda: folder_paths.get_filename_list("checkpoints")))
         ckpts = []
         for i in range(1, input_count + 1):
             ckpt = kwargs.get(f"ckpt_name_{i}", "None")
@@ -846,6 +1138,7 @@ class XY_Input_PromptSR_Batch:
             inputs["required"][f"replace_txt_{i}"] = ("STRING", {"default": "", "multiline": False})
             
         inputs["required"]["input_count"] = ("INT", {"default": XYPLOT_DEF, "min": 0, "max": XYPLOT_LIM})
+        inputs["optional"] = {"spec": spec_input("e.g. cat => dog | fox | wolf (一行一个搜索词)")}
         return inputs
 
     RETURN_TYPES = ("XY",)
@@ -853,7 +1146,9 @@ class XY_Input_PromptSR_Batch:
     FUNCTION = "xy_value"
     CATEGORY = "🪐supernova/XY Plot/Inputs"
 
-    def xy_value(self, input_count, **kwargs):
+    def xy_value(self, input_count, spec="", **kwargs):
+        if spec.strip():
+            return spec_value("PromptSR", parse_prompt_sr_spec(spec))
         prompt_sr = []
         for i in range(1, input_count + 1):
             s_txt = kwargs.get(f"search_txt_{i}", "")
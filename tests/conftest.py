@@ -0,0 +1,61 @@
+# 测试公共设置：把仓库注册为一个包 (不执行根目录 __init__.py 的节点注册)，
+# 不在 ComfyUI 中运行时为 folder_paths / server 提供最小的替身。
+
+import importlib
+import os
+import sys
+import tempfile
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "supernova_nodes"
+
+
+def _install_host_stubs():
+    try:
+        import folder_paths  # noqa: F401
+    except ImportError:
+        base = tempfile.mkdtemp(prefix="supernova-tests-")
+        dirs = {name: os.path.join(base, name) for name in ("input", "output", "temp", "user")}
+        for path in dirs.values():
+            os.makedirs(path, exist_ok=True)
+        fp = types.ModuleType("folder_paths")
+        fp.get_input_directory = lambda: dirs["input"]
+        fp.get_output_directory = lambda: dirs["output"]
+        fp.get_temp_directory = lambda: dirs["temp"]
+        fp.get_user_directory = lambda: dirs["user"]
+        fp.get_directory_by_type = lambda t: dirs.get(t)
+        sys.modules["folder_paths"] = fp
+
+    try:
+        import server  # noqa: F401
+    except ImportError:
+        try:
+            from aiohttp import web
+        except ImportError:
+            # 没有 aiohttp 时不提供 server 替身，依赖它的模块导入失败，相应测试自行跳过
+            return
+
+        class PromptServer:
+            instance = None
+
+            def __init__(self):
+                self.routes = web.RouteTableDef()
+
+            def send_sync(self, event, data, sid=None):
+                pass
+
+        PromptServer.instance = PromptServer()
+        srv = types.ModuleType("server")
+        srv.PromptServer = PromptServer
+        sys.modules["server"] = srv
+
+
+def import_module(name):
+    """按包内路径导入模块，例如 import_module("py.load_image")。"""
+    if PACKAGE not in sys.modules:
+        _install_host_stubs()
+        pkg = types.ModuleType(PACKAGE)
+        pkg.__path__ = [REPO_ROOT]
+        sys.modules[PACKAGE] = pkg
+    return importlib.import_module(f"{PACKAGE}.{name}")
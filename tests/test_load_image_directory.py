@@ -0,0 +1,55 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("numpy")
+from PIL import Image
+
+from conftest import import_module
+
+
+@pytest.fixture
+def load_image():
+    return import_module("py.load_image")
+
+
+@pytest.fixture
+def mixed_sizes(tmp_path):
+    """三张尺寸不同的图片，最后一张带 Alpha 通道。"""
+    paths = []
+    for name, size, mode in (("a.png", (32, 24), "RGB"), ("b.png", (16, 16), "RGB"), ("c.png", (40, 20), "RGBA")):
+        path = tmp_path / name
+        Image.new(mode, size, (200, 100, 50, 128)[:len(mode)]).save(path)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize("size_policy, expected_hw", [("pad to max", (24, 40)), ("resize to first", (24, 32))])
+def test_float16_with_normalized_sizes(load_image, mixed_sizes, size_policy, expected_hw):
+    images, masks = load_image.load_image_directory(mixed_sizes, size_policy=size_policy, dtype=torch.float16)
+
+    assert images.dtype == torch.float16
+    assert masks.dtype == torch.float32
+    assert images.shape == (3, *expected_hw, 3)
+    assert masks.shape == (3, *expected_hw)
+    assert float(images.float().max()) <= 1.0
+
+
+def test_float16_matches_float32(load_image, mixed_sizes):
+    half, _ = load_image.load_image_directory(mixed_sizes, size_policy="pad to max", dtype=torch.float16)
+    full, _ = load_image.load_image_directory(mixed_sizes, size_policy="pad to max", dtype=torch.float32)
+
+    assert torch.allclose(half.float(), full, atol=1e-3)
+
+
+def test_no_alpha_returns_small_mask(load_image, tmp_path):
+    paths = []
+    for k in range(3):
+        path = tmp_path / f"{k}.png"
+        Image.new("RGB", (48, 32), (k * 60, 0, 0)).save(path)
+        paths.append(str(path))
+
+    images, masks = load_image.load_image_directory(paths, size_policy="resize to first")
+
+    assert images.shape == (3, 32, 48, 3)
+    assert masks.shape == (3, 64, 64)
+    assert not masks.any()
@@ -0,0 +1,131 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from conftest import import_module
+
+xy_distributed = import_module("code.xy_distributed")
+
+
+class StubWorker:
+    """模拟 ComfyUI worker 的 /prompt、/history、/view、/queue、/interrupt 接口。
+
+    fail=True 时工作流执行失败；hang=True 时任务一直处于执行中。
+    """
+
+    def __init__(self, fail=False, hang=False):
+        self.fail, self.hang = fail, hang
+        self.prompts = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        worker = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, body, content_type="application/json"):
+                data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with worker.lock:
+                    worker.requests.append((self.path, payload))
+                if self.path == "/prompt":
+                    prompt_id = f"p{len(worker.prompts)}"
+                    worker.prompts[prompt_id] = payload["prompt"]
+                    self.reply({"prompt_id": prompt_id, "node_errors": {}})
+                else:
+                    self.reply({})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.startswith("/history/"):
+                    prompt_id = url.path.rsplit("/", 1)[1]
+                    self.reply({prompt_id: worker.history(prompt_id)} if not worker.hang else {})
+                elif url.path == "/view":
+                    self.reply(parse_qs(url.query)["filename"][0].encode("utf-8"), "image/png")
+                else:
+                    self.send_error(404)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def history(self, prompt_id):
+        if self.fail:
+            return {"status": {"status_str": "error", "completed": False, "messages": ["boom"]}, "outputs": {}}
+        graph = self.prompts[prompt_id]
+        outputs = {node_id: {"images": [{"filename": f"{node_id}.png", "subfolder": "", "type": "temp"}]}
+                   for node_id, node in graph.items() if node["class_type"] == "PreviewImage"}
+        return {"status": {"status_str": "success", "completed": True}, "outputs": outputs}
+
+    def paths(self):
+        with self.lock:
+            return [path for path, _ in self.requests]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_cells(count):
+    return [{"index": i, "ckpt_name": None, "vae_name": None, "lora_stack": [], "seed": i, "steps": 4, "cfg": 7.0,
+             "sampler_name": "euler", "scheduler": "normal", "denoise": 1.0, "positive": "cat", "negative": ""}
+            for i in range(count)]
+
+
+LATENT = {"width": 64, "height": 64, "batch_size": 1}
+
+
+def test_results_from_all_workers_are_merged():
+    with StubWorker() as a, StubWorker() as b:
+        results = xy_distributed.run_distributed(make_cells(5), [a.url, b.url], "base.safetensors", LATENT, poll_interval=0.01)
+
+    assert sorted(results) == [0, 1, 2, 3, 4]
+    assert results[3] == [b"cell_3_out.png"]
+    assert "/prompt" in a.paths() and "/prompt" in b.paths()
+
+
+def test_failed_worker_cells_are_left_for_local_fallback():
+    cells = make_cells(4)
+    with StubWorker() as good, StubWorker(fail=True) as bad:
+        results = xy_distributed.run_distributed(cells, [good.url, bad.url], "base.safetensors", LATENT, poll_interval=0.01)
+
+    good_shard, bad_shard = xy_distributed.shard_plan(cells, 2)
+    assert sorted(results) == sorted(c["index"] for c in good_shard)
+    assert not set(results) & {c["index"] for c in bad_shard}
+
+
+def test_interrupt_cancels_worker_prompts_and_propagates():
+    class Interrupted(Exception):
+        pass
+
+    calls = []
+
+    def check_interrupt():
+        calls.append(1)
+        if len(calls) > 2:
+            raise Interrupted()
+
+    with StubWorker(hang=True) as a, StubWorker(hang=True) as b:
+        with pytest.raises(Interrupted):
+            xy_distributed.run_distributed(make_cells(4), [a.url, b.url], "base.safetensors", LATENT,
+                                           poll_interval=0.01, check_interrupt=check_interrupt)
+
+        for worker in (a, b):
+            cancels = [(path, payload) for path, payload in worker.requests if path in ("/queue", "/interrupt")]
+            assert ("/queue", {"delete": ["p0"]}) in cancels
+            assert ("/interrupt", {"prompt_id": "p0"}) in cancels